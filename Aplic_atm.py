@@ -4,6 +4,7 @@ from dash import html, dcc
 import dash_bootstrap_components as dbc
 from flask_login import LoginManager, current_user
 import flask
+import hashlib
 
 from layouts.login import create_login_layout
 from layouts.player_stats_layout import player_stats_layout
@@ -15,8 +16,8 @@ from utils.db import init_db
 from callbacks import register_callbacks
 from callbacks.physical_data_callbacks import register_physical_data_callbacks
 from callbacks.player_stats_callbacks import register_player_stats_callbacks
-from utils.heatmap_generator import generar_heatmap
-from config import CONFIG
+from utils.heatmap_generator import obtener_heatmap, ESTADOS_CACHEABLES
+from config import CONFIG, HEATMAP_CONFIG
 from components.navbar import create_navbar  
 
 # Inicializar la base de datos
@@ -58,19 +59,32 @@ def load_user_callback(user_id):
 # Endpoint para servir imágenes de heatmap de jugadores
 @server.route('/heatmap/<id_sofascore>')
 def serve_heatmap(id_sofascore):
-    """Genera y sirve un heatmap para un jugador específico"""
+    """
+    Sirve el heatmap de un jugador como imagen (PNG, o WebP reducido con
+    ?variante=miniatura) con ETag para que el navegador pueda revalidar (304).
+    Solo los renders reales y vigentes se pueden cachear; las imágenes de
+    respaldo y los mensajes de error se sirven sin caché para no quedarse
+    fijos en el navegador.
+    """
     # Verificar autenticación
     if not current_user.is_authenticated:
         return "No autorizado", 401
     
     try:
-        # Generar el heatmap
-        heatmap_base64 = generar_heatmap(id_sofascore)
-        # Devolver la imagen
-        return flask.Response(
-            f'<img src="data:image/png;base64,{heatmap_base64}" alt="Heatmap">',
-            mimetype='text/html'
-        )
+        # Generar (o leer de la caché) el heatmap
+        miniatura = flask.request.args.get('variante') == 'miniatura'
+        contenido, estado = obtener_heatmap(id_sofascore, miniatura=miniatura)
+        response = flask.Response(contenido, mimetype='image/webp' if miniatura else 'image/png')
+
+        if estado not in ESTADOS_CACHEABLES:
+            response.cache_control.no_store = True
+            return response
+
+        # Devolver la imagen con validación condicional
+        response.set_etag(hashlib.sha256(contenido).hexdigest())
+        response.cache_control.private = True
+        response.cache_control.max_age = HEATMAP_CONFIG['http_max_age']
+        return response.make_conditional(flask.request)
     except Exception as e:
         print(f"Error al generar heatmap: {str(e)}")
         return f"Error al generar heatmap: {str(e)}", 500
@@ -0,0 +1,59 @@
+# benchmarks/bench_columnar.py
+"""
+Compara el formato 'records' (to_dict + pd.DataFrame) con el formato
+columnar de utils/columnar.py para los datos condicionales de un jugador:
+tamaño del JSON, tiempo de codificación y tiempo de reconstrucción.
+
+Uso: python benchmarks/bench_columnar.py [--jugador Koke] [--repeticiones 200]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.physical_db import obtener_datos_fisicos, obtener_nombres_jugadores
+from utils.columnar import codificar_columnar, decodificar_columnar
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de ejecutar la función"""
+    funcion()  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jugador', default=None)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    jugador = args.jugador or obtener_nombres_jugadores()[0]
+    df = obtener_datos_fisicos(jugador)
+    records = json.dumps(df.to_dict('records'))
+    columnar = json.dumps(codificar_columnar(df))
+
+    # El formato columnar debe reconstruir exactamente el mismo DataFrame
+    pd.testing.assert_frame_equal(df, decodificar_columnar(json.loads(columnar)))
+
+    filas = [
+        ('JSON (bytes)', len(records), len(columnar)),
+        ('codificar (ms)', medir(lambda: json.dumps(df.to_dict('records')), args.repeticiones),
+         medir(lambda: json.dumps(codificar_columnar(df)), args.repeticiones)),
+        ('reconstruir (ms)', medir(lambda: pd.DataFrame(json.loads(records)), args.repeticiones),
+         medir(lambda: decodificar_columnar(json.loads(columnar)), args.repeticiones)),
+    ]
+    print(f"{jugador}: {len(df)} jornadas x {len(df.columns)} columnas")
+    print(f"{'':<18}{'records':>12}{'columnar':>12}")
+    for nombre, valor_records, valor_columnar in filas:
+        print(f"{nombre:<18}{valor_records:>12.2f}{valor_columnar:>12.2f}")
+
+if __name__ == '__main__':
+    main()
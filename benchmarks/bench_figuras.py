@@ -0,0 +1,133 @@
+# benchmarks/bench_figuras.py
+"""
+Compara la latencia de construir y serializar las figuras con plotly.express
+(camino anterior) y con los constructores directos de utils/data_viz.py.
+Se mide lo que hace cada callback: construir la figura y pasarla a JSON.
+También se mide el acierto de la caché de figuras (utils/figure_cache.py) tal
+como lo usan los callbacks: obtener la figura y que Dash la serialice, con el
+JSON guardado como texto (camino anterior: json.loads en cada acierto) y con
+el dict guardado (camino actual).
+
+Uso: python benchmarks/bench_figuras.py [--repeticiones 30]
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG
+from utils.data_viz import (format_stat_name, crear_grafico_barras, crear_grafico_histograma,
+                            crear_grafico_scatter_fisico)
+from utils.match_stats_store import obtener_particion_jornadas, obtener_cubo_estadisticas
+from utils.plantilla_graficos import PLANTILLA
+from utils.figure_cache import figura_en_cache
+
+# Caminos anteriores con plotly.express, como referencia
+
+def barras_px(particion, jornada, metrica):
+    df = particion.filas_jornada(jornada).sort_values(by=metrica, ascending=False)
+    fig = px.bar(df, x='Nombre', y=metrica, color='Nombre',
+                 title=f"{format_stat_name(metrica)} - Jornada {jornada}",
+                 labels={'Nombre': 'Jugador', metrica: format_stat_name(metrica)}, template=PLANTILLA)
+    fig.update_layout(showlegend=False, xaxis={'categoryorder': 'total descending'})
+    return fig
+
+def histograma_px(cubo, rango_jornadas, metrica):
+    jornadas, medias = cubo.serie_equipo(metrica, rango_jornadas)
+    df = pd.DataFrame({'Jornada': jornadas, metrica: medias})
+    fig = px.bar(df, x='Jornada', y=metrica,
+                 title=f"Evolución de {format_stat_name(metrica)} por Jornada",
+                 labels={'Jornada': 'Jornada', metrica: format_stat_name(metrica)},
+                 color_discrete_sequence=[CONFIG["team_colors"]["primary"]], template=PLANTILLA)
+    fig.add_scatter(x=df['Jornada'], y=df[metrica], mode='lines', name='Tendencia',
+                    line=dict(color=CONFIG["team_colors"]["secondary"], width=3))
+    fig.update_layout(bargap=0.3, xaxis=dict(tickmode='linear', dtick=1))
+    return fig
+
+def scatter_fisico_px(df, metrica_x, metrica_y, metrica_size):
+    fig = px.scatter(df, x=metrica_x, y=metrica_y, size=metrica_size, color="Jornada",
+                     hover_name="Jornada", size_max=30,
+                     color_continuous_scale=px.colors.sequential.Blues, template=PLANTILLA)
+    fig.update_layout(xaxis_title=metrica_x.replace('_', ' ').title(),
+                      yaxis_title=metrica_y.replace('_', ' ').title(),
+                      coloraxis_colorbar_title="Jornada", margin=dict(l=40, r=40, t=60, b=40))
+    z = np.polyfit(df[metrica_x], df[metrica_y], 1)
+    x_range = np.linspace(df[metrica_x].min(), df[metrica_x].max(), 100)
+    fig.add_scatter(x=x_range, y=np.poly1d(z)(x_range), mode='lines',
+                    line=dict(color='rgba(0, 0, 0, 0.5)', dash='dash'), showlegend=False)
+    return fig
+
+def datos_fisicos_sinteticos(jornadas=38, semilla=0):
+    """Datos condicionales de un jugador parecidos a los de la BD"""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'Jornada': np.arange(1, jornadas + 1),
+        'Distancia_total': rng.normal(10500, 600, jornadas),
+        'Velocidad_max': rng.normal(31, 1.5, jornadas),
+        'Sprints': rng.integers(10, 40, jornadas)
+    })
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de construir la figura y serializarla, y tamaño del JSON"""
+    pio.to_json(funcion(), validate=False)  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        contenido = pio.to_json(funcion(), validate=False)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos)), len(contenido)
+
+def medir_acierto(funcion, repeticiones):
+    """Mediana en ms de obtener la figura de la caché y serializarla como Dash"""
+    to_json_plotly(funcion())  # calentamiento (y primer fallo de la caché)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        to_json_plotly(funcion())
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=30)
+    args = parser.parse_args()
+
+    particion = obtener_particion_jornadas()
+    cubo = obtener_cubo_estadisticas()
+    rango = [cubo.jornadas[0], cubo.jornadas[-1]]
+    fisicos = datos_fisicos_sinteticos()
+
+    casos = {
+        'barras': (lambda: barras_px(particion, 5, 'xG'),
+                   lambda: crear_grafico_barras(particion, 5, 'xG')),
+        'histograma': (lambda: histograma_px(cubo, rango, 'xG'),
+                       lambda: crear_grafico_histograma(cubo, rango, 'xG')),
+        'scatter fisico': (lambda: scatter_fisico_px(fisicos, 'Distancia_total', 'Velocidad_max', 'Sprints'),
+                           lambda: crear_grafico_scatter_fisico(fisicos, 'Distancia_total', 'Velocidad_max', 'Sprints'))
+    }
+
+    print(f"{'grafico':<16}{'px (ms)':>10}{'directo (ms)':>14}{'mejora':>9}{'px (B)':>9}{'directo (B)':>13}")
+    for nombre, (con_px, directo) in casos.items():
+        ms_px, bytes_px = medir(con_px, args.repeticiones)
+        ms_directo, bytes_directo = medir(directo, args.repeticiones)
+        print(f"{nombre:<16}{ms_px:>10.2f}{ms_directo:>14.2f}{ms_px / ms_directo:>8.1f}x"
+              f"{bytes_px:>9}{bytes_directo:>13}")
+
+    # Acierto de la caché: JSON como texto (json.loads en cada acierto) frente a dict
+    print(f"\n{'acierto cache':<16}{'texto (ms)':>12}{'dict (ms)':>12}{'mejora':>9}")
+    for nombre, (_, directo) in casos.items():
+        guardado = pio.to_json(directo(), validate=False)
+        ms_texto = medir_acierto(lambda: json.loads(guardado), args.repeticiones)
+        ms_dict = medir_acierto(lambda: figura_en_cache(f"bench-{nombre}", (), 0, directo), args.repeticiones)
+        print(f"{nombre:<16}{ms_texto:>12.3f}{ms_dict:>12.3f}{ms_texto / ms_dict:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
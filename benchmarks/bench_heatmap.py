@@ -0,0 +1,55 @@
+# benchmarks/bench_heatmap.py
+"""
+Compara el tiempo de renderizado de los motores de heatmap (matplotlib y
+Pillow) con puntos sintéticos parecidos a los de la API de Sofascore.
+
+Uso: python benchmarks/bench_heatmap.py [--puntos 300] [--repeticiones 20]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.heatmap_generator import MOTORES, renderizar_heatmap
+
+def generar_puntos(n, semilla=0):
+    """Puntos en coordenadas de Sofascore (0-100) con conteos entre 1 y 12"""
+    rng = np.random.default_rng(semilla)
+    x = np.clip(rng.normal(55, 18, n), 0, 100)
+    y = np.clip(rng.normal(50, 22, n), 0, 100)
+    counts = rng.integers(1, 12, n)
+    return [{'x': float(xi), 'y': float(yi), 'count': int(ci)} for xi, yi, ci in zip(x, y, counts)]
+
+def medir(motor, puntos, repeticiones):
+    """Devuelve (mediana en ms, tamaño del PNG en bytes)"""
+    png = renderizar_heatmap(puntos, motor)  # calentamiento (fondos y lienzos)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        png = renderizar_heatmap(puntos, motor)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos)), len(png)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--puntos', type=int, default=300)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    puntos = generar_puntos(args.puntos)
+    resultados = {motor: medir(motor, puntos, args.repeticiones) for motor in MOTORES}
+
+    print(f"{'motor':<12}{'mediana (ms)':>14}{'PNG (KB)':>10}")
+    for motor, (ms, tamano) in resultados.items():
+        print(f"{motor:<12}{ms:>14.1f}{tamano / 1024:>10.1f}")
+
+    base = resultados['matplotlib'][0]
+    for motor, (ms, _) in resultados.items():
+        if motor != 'matplotlib':
+            print(f"{motor}: {base / ms:.1f}x más rápido que matplotlib")
+
+if __name__ == '__main__':
+    main()
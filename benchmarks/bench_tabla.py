@@ -0,0 +1,106 @@
+# benchmarks/bench_tabla.py
+"""
+Compara el formateo de la tabla de datos físicos fila a fila (iterrows,
+implementación anterior) con el formateo por columnas de utils/tabla_fisica.py,
+y mide el cálculo de las reglas de utils/formato_condicional.py.
+Casos: un jugador (38 jornadas), la plantilla completa y varias temporadas
+de la plantilla, siempre con todas las métricas seleccionadas (20+).
+
+Uso: python benchmarks/bench_tabla.py [--temporadas 5] [--repeticiones 10]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.physical_db import obtener_datos_fisicos, obtener_nombres_jugadores
+from utils.tabla_fisica import formatear_tabla
+from utils.formato_condicional import reglas_formato_condicional
+
+def formatear_tabla_iterrows(df, metricas_seleccionadas):
+    """Implementación anterior de actualizar_tabla_datos, como referencia"""
+    data = []
+    for i, row in df.iterrows():
+        data_row = {'Jornada': str(row['Jornada'])}
+        for metrica in metricas_seleccionadas:
+            if metrica in row:
+                if pd.api.types.is_numeric_dtype(df[metrica]):
+                    data_row[metrica] = f"{row[metrica]:.1f}" if isinstance(row[metrica], float) else str(row[metrica])
+                else:
+                    data_row[metrica] = str(row[metrica])
+        data.append(data_row)
+    return data
+
+def mismas_filas(texto, filas):
+    """
+    Compara las filas de texto anteriores con las numéricas actuales. Se admite
+    una décima de diferencia: np.round y el formato '.1f' pueden redondear
+    distinto los valores que caen justo en la mitad (194.35).
+    """
+    for fila_texto, fila in zip(texto, filas):
+        for clave, valor in fila.items():
+            if isinstance(valor, float) or valor is None:
+                anterior = float(fila_texto[clave])
+                if valor is None:
+                    assert np.isnan(anterior)
+                else:
+                    assert abs(anterior - valor) <= 0.1 + 1e-9
+            else:
+                assert fila_texto[clave] == str(valor)
+    return len(texto) == len(filas)
+
+def jugador_38_jornadas(df_jugador):
+    """Repite las jornadas del jugador hasta completar 38"""
+    repeticiones = int(np.ceil(38 / len(df_jugador)))
+    df = pd.concat([df_jugador] * repeticiones, ignore_index=True).iloc[:38].copy()
+    df['Jornada'] = np.arange(1, 39)
+    return df
+
+def varias_temporadas(df_plantilla, temporadas):
+    """Concatena la plantilla varias veces como si fueran temporadas distintas"""
+    return pd.concat([df_plantilla] * temporadas, ignore_index=True)
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de ejecutar la función"""
+    funcion()  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--temporadas', type=int, default=5)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    jugadores = obtener_nombres_jugadores()
+    plantilla = pd.concat([obtener_datos_fisicos(jugador) for jugador in jugadores], ignore_index=True)
+    metricas = [columna for columna in plantilla.columns if columna not in ('id', 'Jornada', 'Nombre')]
+
+    casos = {
+        'jugador (38 jornadas)': jugador_38_jornadas(obtener_datos_fisicos(jugadores[0])),
+        'plantilla': plantilla,
+        f'plantilla x {args.temporadas} temporadas': varias_temporadas(plantilla, args.temporadas)
+    }
+
+    print(f"{len(metricas)} métricas seleccionadas")
+    print(f"{'caso':<28}{'filas':>7}{'iterrows (ms)':>15}{'columnas (ms)':>15}{'mejora':>9}{'reglas':>8}{'reglas (ms)':>13}")
+    for nombre, df in casos.items():
+        # Las dos implementaciones deben mostrar los mismos valores
+        assert mismas_filas(formatear_tabla_iterrows(df, metricas), formatear_tabla(df, metricas))
+        ms_iterrows = medir(lambda: formatear_tabla_iterrows(df, metricas), args.repeticiones)
+        ms_columnas = medir(lambda: formatear_tabla(df, metricas), args.repeticiones)
+        n_reglas = len(reglas_formato_condicional(df, metricas))
+        ms_reglas = medir(lambda: reglas_formato_condicional(df, metricas), args.repeticiones)
+        print(f"{nombre:<28}{len(df):>7}{ms_iterrows:>15.2f}{ms_columnas:>15.2f}{ms_iterrows / ms_columnas:>8.1f}x"
+              f"{n_reglas:>8}{ms_reglas:>13.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# callbacks/clientside_callbacks.py
+from dash.dependencies import Input, Output, State
+
+def register_clientside_callbacks(app):
+    """
+    Registra los callbacks que solo dependen de datos que ya están en el
+    navegador. Se ejecutan en JavaScript, sin petición al servidor.
+    """
+    # Abrir/cerrar el menú de la barra de navegación en pantallas pequeñas
+    app.clientside_callback(
+        """
+        function(n, is_open) {
+            if (n) {
+                return !is_open;
+            }
+            return is_open;
+        }
+        """,
+        Output("navbar-collapse", "is_open"),
+        [Input("navbar-toggler", "n_clicks")],
+        [State("navbar-collapse", "is_open")],
+    )
+
+    # Filtrar el dropdown de jugadores por posición con el mapa
+    # posición -> jugadores incluido en el layout
+    app.clientside_callback(
+        """
+        function(posicion, jugadores_por_posicion) {
+            if (!jugadores_por_posicion) {
+                return window.dash_clientside.no_update;
+            }
+            var jugadores = jugadores_por_posicion[posicion] || [];
+            return jugadores.map(function(jugador) {
+                return {label: jugador, value: jugador};
+            });
+        }
+        """,
+        Output('jugadores-dropdown', 'options'),
+        [Input('posicion-dropdown', 'value')],
+        [State('jugadores-por-posicion-store', 'data')]
+    )
@@ -1,324 +1,97 @@
 import pandas as pd
 import numpy as np
-import sqlite3
 import plotly.graph_objects as go
 import plotly.express as px
 import dash
 from dash.dependencies import Input, Output, State
-from dash import html, dcc, dash_table
+from dash import html, dcc, dash_table, Patch
 import dash_bootstrap_components as dbc
 import requests
 import io
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
-from config import CONFIG
-import base64
+from config import CONFIG, SESSION_STORE_CONFIG
 import json
 import os
+import hashlib
 from flask_login import current_user
-import unicodedata
 from utils.pdf_export import exportar_pdf
 from utils.pdf_export import exportar_pdf_fisico
-from utils.heatmap_generator import generar_heatmap
+from utils.physical_db import obtener_datos_fisicos, obtener_nombres_jugadores, firma_bd
+from utils.physical_summary import obtener_resumen_jugador, obtener_referencia_posicion, POSICION_TODAS
+from utils.player_identity import obtener_indice_jugadores, corregir_codificacion
+from utils.plantilla_graficos import PLANTILLA
+from utils.data_viz import crear_grafico_scatter_fisico, traza_barras, parchear_trazas
+from utils.session_store import nueva_clave, guardar_en_sesion, obtener_de_sesion
+from utils.columnar import codificar_columnar, decodificar_columnar, es_columnar
+from utils.tabla_fisica import formatear_tabla, columnas_tabla
+from utils.formato_condicional import reglas_formato_condicional
 
+# Estadísticas clave de la tarjeta del jugador: clave -> columna del resumen materializado
+ESTADISTICAS_TARJETA = {
+    'avg_distancia': 'avg_Distancia',
+    'max_distancia': 'max_Distancia',
+    'avg_velocidad': 'avg_Max_Speed',
+    'max_velocidad': 'max_Max_Speed',
+    'avg_sprints': 'avg_Sprints_Abs_Cnt'
+}
+
+def version_datos_fisicos():
+    """Versión corta de la BD de datos físicos (cambia cuando se modifica)"""
+    return hashlib.sha1(repr(firma_bd()).encode('utf-8')).hexdigest()[:12]
 
 def register_physical_data_callbacks(app):
     """
     Registra los callbacks para la página de datos físicos/condicionales
     """
     
-    # Función para normalizar nombres (quitar acentos, minúsculas)
-    def normalize_name(name):
-        if not name:
-            return ""
-        
-        name = str(name).lower()
-        name = name.replace('ø', 'o')
-        name = name.replace('æ', 'ae')
-        name = name.replace('å', 'a')
-
-        return ' '.join(unicodedata.normalize('NFKD', str(name).lower())
-                        .encode('ASCII', 'ignore')
-                        .decode('ASCII')
-                        .split())
-    
-    # Define el diccionario de jugadores una sola vez
-    def get_jugadores_default():
-        return {
-            'Julián Álvarez': {                            
-                'nombre_completo': 'Julián Álvarez',
-                'short_name': 'Julián',
-                'id_sofascore': 944656,
-                'ruta_foto': '/assets/players/19.png'
-            },
-            'Axel Witsel': {
-                'nombre_completo': 'Axel Witsel',
-                'short_name': 'Witsel',
-                'id_sofascore': 35612,
-                'ruta_foto': '/assets/players/20.png'
-            },
-            'Javi Galán': {
-                'nombre_completo': 'Javi Galán',
-                'short_name': 'Galán',
-                'id_sofascore': 825133,
-                'ruta_foto': '/assets/players/21.png'
-            },
-            'Giuliano Simeone': {
-                'nombre_completo': 'Giuliano Simeone',
-                'short_name': 'Giuliano',
-                'id_sofascore': 1099352,
-                'ruta_foto': '/assets/players/22.png'
-            },
-            'Reinildo Mandava': {
-                'nombre_completo': 'Reinildo Mandava',
-                'short_name': 'Reinildo',
-                'id_sofascore': 831424,
-                'ruta_foto': '/assets/players/23.png'
-            },
-            'Robin Le Normand': {
-                'nombre_completo': 'Robin Le Normand',
-                'short_name': 'Le Normand',
-                'id_sofascore': 787751,
-                'ruta_foto': '/assets/players/24.png'
-            },
-            'Adrián Niño': {
-                'nombre_completo': 'Adrián Niño',
-                'short_name': 'Niño',
-                'id_sofascore': 1402927,
-                'ruta_foto': '/assets/players/24.png'
-            }
-        }
-    
-    def cargar_archivo_maestro():
-        """Carga el archivo maestro de jugadores"""
-        try:
-            if os.path.exists('data/jugadores_master.csv'):
-                # Diferentes configuraciones de lectura
-                try:
-                    # Con tab como separador
-                    maestro_df = pd.read_csv('data/jugadores_master.csv', sep='\t', encoding='utf-8')
-                    
-                    if len(maestro_df.columns) == 1 and ';' in maestro_df.columns[0]:                        
-                        primera_col = maestro_df.columns[0]
-                        nuevas_cols = primera_col.split(';')
-                        valores_split = [row.split(';') for row in maestro_df[primera_col]]
-                        maestro_df = pd.DataFrame(valores_split, columns=nuevas_cols)
-                        
-                    else:
-                        print("Archivo maestro cargado con separador tab")
-                except Exception as e1:
-                    try:
-                        # Con separador punto y coma
-                        maestro_df = pd.read_csv('data/jugadores_master.csv', sep=';', encoding='utf-8')
-                        
-                    except Exception as e2:
-                        try:
-                            # Con separador coma
-                            maestro_df = pd.read_csv('data/jugadores_master.csv', encoding='utf-8')
-                        except Exception as e3:                            
-                            # Usar función en lugar del diccionario
-                            jugadores_info = get_jugadores_default()
-                            return pd.DataFrame.from_dict(jugadores_info, orient='index').reset_index().rename(columns={'index': 'nombre'})
-
-                # Normalizar columnas cruciales
-                if 'nombre_completo' in maestro_df.columns:
-                    maestro_df['nombre'] = maestro_df['nombre_completo']  
-            
-                if 'nombre_completo' in maestro_df.columns and 'nombre_completo_norm' not in maestro_df.columns:
-                    maestro_df['nombre_completo_norm'] = maestro_df['nombre_completo'].apply(normalize_name)
-            
-                if 'short_name' in maestro_df.columns and 'short_name_norm' not in maestro_df.columns:
-                    maestro_df['short_name_norm'] = maestro_df['short_name'].apply(normalize_name)
-            
-                # Asegurar que 'ruta_foto' comienza con '/'
-                if 'ruta_foto' in maestro_df.columns:
-                    maestro_df['ruta_foto'] = maestro_df['ruta_foto'].apply(
-                        lambda x: '/' + x.lstrip('/') if isinstance(x, str) else x
-                    )
-            
-                # Corregir rutas de fotos específicas (solo en memoria)
-                for idx, row in maestro_df.iterrows():
-                    if 'nombre_completo' in row and row['nombre_completo'] == 'Julián Álvarez' and 'ruta_foto' in maestro_df.columns:
-                        maestro_df.at[idx, 'ruta_foto'] = '/assets/players/19.png'
-                    if 'nombre_completo' in row and row['nombre_completo'] == 'Jan Oblak' and 'ruta_foto' in maestro_df.columns:
-                        maestro_df.at[idx, 'ruta_foto'] = '/assets/players/13.png'
-                    if 'nombre_completo' in row and row['nombre_completo'] == 'Reinildo Mandava' and 'ruta_foto' in maestro_df.columns:
-                        maestro_df.at[idx, 'ruta_foto'] = '/assets/players/23.png'
-                    
-                return maestro_df
-            else:
-                print("No se encontró el archivo maestro. Usando datos fijos para jugadores clave.")
-                # Usar función en lugar del diccionario
-                jugadores_info = get_jugadores_default()
-                return pd.DataFrame.from_dict(jugadores_info, orient='index').reset_index().rename(columns={'index': 'nombre'})
-        except Exception as e:
-            print(f"Error al cargar archivo maestro: {e}")
-            import traceback
-            traceback.print_exc()
-            # Usar función en lugar del diccionario
-            jugadores_info = get_jugadores_default()
-            return pd.DataFrame.from_dict(jugadores_info, orient='index').reset_index().rename(columns={'index': 'nombre'})
-    
     # Función auxiliar para cargar datos condicionales
     def cargar_datos_fisicos(nombre_jugador):
         """Carga los datos físicos de un jugador desde la BD"""
-        conn = sqlite3.connect('data/ATM_condic_24_25.db')
-        query = f"""
-        SELECT * FROM datos_fisicos 
-        WHERE Nombre = ?
-        ORDER BY Jornada
-        """
-        df = pd.read_sql(query, conn, params=[nombre_jugador])
-        conn.close()
-        return df
+        return obtener_datos_fisicos(nombre_jugador)
     
     # Función auxiliar para cargar datos del jugador
     def cargar_datos_jugador(nombre_jugador):
         """Carga los datos maestros de un jugador"""
         try:
             # Corregir nombre del jugador
-            try:
-                nombre_jugador_corregido = nombre_jugador.encode('latin1').decode('utf-8')
-            except:
-                nombre_jugador_corregido = nombre_jugador
-        
-            # Obtener estadísticas adicionales de los datos físicos
-            conn = sqlite3.connect('data/ATM_condic_24_25.db')
-        
-            # Consultar estadísticas agregadas
-            query_stats = """
-            SELECT 
-                AVG(Distancia) as avg_distancia,
-                MAX(Distancia) as max_distancia,
-                AVG(Max_Speed) as avg_velocidad,
-                MAX(Max_Speed) as max_velocidad,
-                AVG(Sprints_Abs_Cnt) as avg_sprints
-            FROM datos_fisicos 
-            WHERE Nombre = ?
-            """
-        
-            stats_df = pd.read_sql(query_stats, conn, params=[nombre_jugador])
+            nombre_jugador_corregido = corregir_codificacion(nombre_jugador)
+            indice = obtener_indice_jugadores()
         
-            # Consultar datos básicos
-            query_basic = """
-            SELECT Nombre as nombre, Posicion as posicion, Edad as edad
-            FROM datos_fisicos 
-            WHERE Nombre = ?
-            LIMIT 1
-            """
+            # Resumen materializado del jugador (datos básicos y estadísticas agregadas)
+            resumen = obtener_resumen_jugador(nombre_jugador)
         
-            jugador_df = pd.read_sql(query_basic, conn, params=[nombre_jugador])
-            conn.close()
-        
-            if not jugador_df.empty:
+            if resumen is not None:
                 # Datos básicos del jugador
-                jugador = jugador_df.iloc[0].to_dict()
+                jugador = {
+                    'nombre': resumen['Nombre'],
+                    'posicion': resumen['Posicion'],
+                    'edad': int(resumen['max_Edad']) if not pd.isna(resumen.get('max_Edad')) else 'No disponible'
+                }
             
                 # Mostrar nombre corregido si tiene caracteres especiales
                 jugador['nombre_display'] = nombre_jugador_corregido
             
                 # Agregar estadísticas clave
-                if not stats_df.empty:
-                    for col in stats_df.columns:
-                        if not pd.isna(stats_df[col].iloc[0]):
-                            jugador[col] = round(stats_df[col].iloc[0], 1)
+                for clave, columna in ESTADISTICAS_TARJETA.items():
+                    if columna in resumen and not pd.isna(resumen[columna]):
+                        jugador[clave] = round(resumen[columna], 1)
             
                 # Valores por defecto
                 jugador['id_sofascore'] = None
                 jugador['foto_url'] = '/assets/imagenes/player_placeholder.png'
                 jugador['nacionalidad'] = 'ESP'
             
-                # Cargar archivo maestro para datos adicionales
-                maestro_df = cargar_archivo_maestro()
-            
-                if not maestro_df.empty:
-                    try:
-                        # Normalizar nombre para búsqueda
-                        nombre_norm = normalize_name(nombre_jugador_corregido)
-                                            
-                        # Buscar coincidencia en el archivo maestro
-                        for idx, row in maestro_df.iterrows():
-                            if 'short_name' in maestro_df.columns:
-                                row_short_name_norm = normalize_name(str(row['short_name']))
-                            
-                                # Si hay coincidencia por nombre
-                                if row_short_name_norm == nombre_norm or normalize_name(str(row['nombre_completo'])).find(nombre_norm) >= 0:
-                                                                    
-                                    # Actualizar datos del jugador
-                                    jugador['nombre'] = row['nombre_completo']
-                                
-                                    if 'id_sofascore' in maestro_df.columns:
-                                        jugador['id_sofascore'] = int(float(row['id_sofascore'])) if not pd.isna(row['id_sofascore']) else None
-                                
-                                    if 'ruta_foto' in maestro_df.columns:
-                                        jugador['foto_url'] = row['ruta_foto']
-                                    elif 'image_sofascore' in maestro_df.columns:
-                                        jugador['foto_url'] = row['image_sofascore']
-                                
-                                    if 'pais' in maestro_df.columns:
-                                        jugador['nacionalidad'] = row['pais']
-                                
-                                    break
-                    
-                    except Exception as e:
-                        print(f"Error al procesar archivo maestro: {e}")
-                        import traceback
-                        traceback.print_exc()
-
-                jugadores_respaldo = {
-                   'Julián Álvarez': {                            
-                        'nombre_completo': 'Julián Álvarez',
-                        'short_name': 'Julián',
-                        'id_sofascore': 944656,
-                        'ruta_foto': '/assets/players/19.png'
-                    },
-                    'Axel Witsel': {
-                        'nombre_completo': 'Axel Witsel',
-                        'short_name': 'Witsel',
-                        'id_sofascore': 35612,
-                        'ruta_foto': '/assets/players/20.png'
-                    },
-                    'Javi Galán': {
-                        'nombre_completo': 'Javi Galán',
-                        'short_name': 'Galán',
-                        'id_sofascore': 825133,
-                        'ruta_foto': '/assets/players/21.png'
-                    },
-                    'Giuliano Simeone': {
-                        'nombre_completo': 'Giuliano Simeone',
-                        'short_name': 'Giuliano',
-                        'id_sofascore': 1099352,
-                        'ruta_foto': '/assets/players/22.png'
-                    },
-                    'Reinildo Mandava': {
-                        'nombre_completo': 'Reinildo Mandava',
-                        'short_name': 'Reinildo',
-                        'id_sofascore': 831424,
-                        'ruta_foto': '/assets/players/23.png'
-                    },
-                    'Robin Le Normand': {
-                        'nombre_completo': 'Robin Le Normand',
-                        'short_name': 'Le Normand',
-                        'id_sofascore': 787751,
-                        'ruta_foto': '/assets/players/24.png'
-                    },
-                    'Adrián Niño': {
-                        'nombre_completo': 'Adrián Niño',
-                        'short_name': 'Niño',
-                        'id_sofascore': 1402927,
-                        'ruta_foto': '/assets/players/24.png'
-                    }
-                }
-
-                # Buscar por nombre normalizado
-                nombre_norm = normalize_name(nombre_jugador_corregido)
-                if nombre_norm in jugadores_respaldo:
-
-                    info_respaldo = jugadores_respaldo[nombre_norm]
-                    for key, value in info_respaldo.items():
-                        jugador[key] = value
-
+                # Datos adicionales del índice de jugadores (archivo maestro)
+                ficha = indice.ficha(indice.resolver_nombre(nombre_jugador))
+                if ficha is not None:
+                    jugador['nombre'] = ficha['nombre_completo']
+                    jugador['id_sofascore'] = ficha['id_sofascore']
+                    if ficha.get('ruta_foto'):
+                        jugador['foto_url'] = ficha['ruta_foto']
+                    if ficha.get('pais'):
+                        jugador['nacionalidad'] = ficha['pais']
 
                 return jugador
             else:
@@ -346,6 +119,57 @@ def register_physical_data_callbacks(app):
                 'nacionalidad': 'ESP',
             }
 
+    # Función auxiliar para cargar los datos de la sesión comprobando permisos
+    def cargar_datos_sesion(nombre_jugador):
+        """
+        Devuelve {'jugador': dict, 'condicionales': DataFrame} o el aviso de
+        acceso restringido si el usuario es un jugador y pide a otro
+        """
+        if current_user.is_authenticated and current_user.role == 'player':
+            # El jugador seleccionado debe ser el mismo que el del usuario
+            indice = obtener_indice_jugadores()
+            id_usuario = indice.resolver_usuario(current_user.id, getattr(current_user, 'name', None))
+            permitido = id_usuario is not None and indice.resolver_nombre(nombre_jugador) == id_usuario
+            
+            if not permitido:
+                print(f"Acceso denegado: {current_user.id} intentó acceder a {nombre_jugador}")
+                return {
+                    'error': 'No tienes permiso para ver estos datos',
+                    'restricted': True
+                }
+        
+        return {
+            'jugador': cargar_datos_jugador(nombre_jugador),
+            'condicionales': cargar_datos_fisicos(nombre_jugador)
+        }
+    
+    # Función auxiliar para obtener los datos a partir de la referencia del store
+    def resolver_datos(referencia):
+        """
+        Devuelve los datos de la sesión a los que apunta datos-jugador-store
+        (que solo guarda clave, versión y jugador). Si no están en el almacén
+        del proceso (expulsados, otro worker o BD modificada) se vuelven a cargar.
+        Con 'datos_en_cliente' los datos vienen en el propio store en formato columnar.
+        """
+        if not referencia or referencia.get('restricted', False):
+            return referencia
+        
+        # Datos enviados al navegador en formato columnar
+        if es_columnar(referencia.get('condicionales')):
+            return dict(referencia, condicionales=decodificar_columnar(referencia['condicionales']))
+        
+        if 'clave' not in referencia:
+            return referencia
+        
+        usuario = current_user.get_id() if current_user.is_authenticated else None
+        version = version_datos_fisicos()
+        datos = obtener_de_sesion(referencia['clave'], usuario, version)
+        if datos is None:
+            datos = cargar_datos_sesion(referencia['jugador'])
+            if not datos.get('restricted', False):
+                guardar_en_sesion(referencia['clave'], usuario, version, datos)
+        return datos
+
     ## Callback para mostrar la información del jugador y el heatmap
     @app.callback(
         [Output('info-jugador-container', 'children'),
@@ -353,6 +177,7 @@ def register_physical_data_callbacks(app):
         [Input('datos-jugador-store', 'data')]
     )
     def mostrar_info_jugador(datos):
+        datos = resolver_datos(datos)
         if not datos:
             return html.Div("Selecciona un jugador para ver su información."), html.Div()
         
@@ -413,38 +238,24 @@ def register_physical_data_callbacks(app):
             html.P("El mapa de calor no está disponible para este jugador.", className="text-muted")
         ])
 
-        # Si tenemos ID de sofascore, generamos el heatmap
+        # Si tenemos ID de sofascore, el navegador pide el heatmap al endpoint
+        # /heatmap (imagen cacheada en disco y revalidada con ETag)
         if 'id_sofascore' in jugador and jugador['id_sofascore']:
-            try:
-                # Obtener el heatmap base64
-                heatmap_base64 = generar_heatmap(jugador['id_sofascore'])
-                
-                # Verificar que heatmap_base64 tenga un valor
-                if heatmap_base64:
-                    heatmap_container = html.Div([
-                        html.Div([
-                            html.Img(
-                                src=f"data:image/png;base64,{heatmap_base64}",
-                                style={
-                                    'max-width': '100%',
-                                    'max-height': '300px',  
-                                    'border-radius': '5px',
-                                    'object-fit': 'contain' 
-                                },
-                                className="mt-2"
-                            )
-                        ], id="heatmap-imagen-container", style={'textAlign': 'center'})
-                    ])
-                else:
-                    heatmap_container = html.Div([
-                        html.P("No se pudo generar el mapa de calor.", className="text-muted")
-                    ])
-            except Exception as e:
-                print(f"Error al generar heatmap: {e}")
-                heatmap_container = html.Div([
-                    html.H5("Mapa de Calor", className="mb-2"),
-                    html.P(f"Error al generar mapa de calor: {str(e)}", className="text-danger")
-                ])
+            heatmap_container = html.Div([
+                html.Div([
+                    html.Img(
+                        src=f"/heatmap/{jugador['id_sofascore']}?variante=miniatura",
+                        alt="Mapa de calor",
+                        style={
+                            'max-width': '100%',
+                            'max-height': '300px',  
+                            'border-radius': '5px',
+                            'object-fit': 'contain' 
+                        },
+                        className="mt-2"
+                    )
+                ], id="heatmap-imagen-container", style={'textAlign': 'center'})
+            ])
         return info_jugador, heatmap_container
 
     # Callback para actualizar las opciones del dropdown de jugadores según el rol
@@ -459,99 +270,20 @@ def register_physical_data_callbacks(app):
             return [], None
         
         # Cargar todos los jugadores disponibles
-        conn = sqlite3.connect('data/ATM_condic_24_25.db')
-        query = "SELECT DISTINCT Nombre FROM datos_fisicos ORDER BY Nombre"
-        df = pd.read_sql(query, conn)
-        conn.close()
-        
-        jugadores = df['Nombre'].tolist()
+        jugadores = obtener_nombres_jugadores()
 
         # Si el usuario es un jugador, filtrar para mostrar solo su propio nombre
         if current_user.is_authenticated and current_user.role == 'player':
-            # Intentar hacer coincidir el nombre del usuario con un jugador
+            # Resolver el jugador del usuario y quedarse con sus nombres en la BD
+            indice = obtener_indice_jugadores()
+            id_usuario = indice.resolver_usuario(current_user.id, getattr(current_user, 'name', None))
             jugadores_coincidentes = []
-            
-            # 1. Extraer el nombre del jugador desde el ID de usuario (username)
-            # Ejemplos: 'gimenez' -> 'Giménez', 'j_musso' -> 'Musso'
-            username_parts = current_user.id.replace('_', ' ').split()
-            possible_matches = []
-            
-            # Añadir el nombre completo del usuario
-            if hasattr(current_user, 'name'):
-                possible_matches.append(current_user.name)
-            
-            # Añadir partes del nombre de usuario
-            for part in username_parts:
-                if len(part) > 3:  
-                    possible_matches.append(part)
-            
-            # 2. Buscar coincidencias entre jugadores
-            for jugador in jugadores:
-                jugador_lower = jugador.lower()
-                
-                # Comprobar si alguna de las posibles coincidencias está en el nombre del jugador
-                for match in possible_matches:
-                    match_lower = match.lower()
-                    
-                    # Intentar normalizar para eliminar acentos
-                    try:
-                        match_norm = normalize_name(match)
-                        jugador_norm = normalize_name(jugador)
-                        
-                        if (match_lower in jugador_lower or 
-                            jugador_lower in match_lower or
-                            match_norm in jugador_norm or
-                            jugador_norm in match_norm):
-                            
-                            jugadores_coincidentes.append(jugador)                            
-                            break
-                    except:
-                        # Si falla la normalización, intentar con string directo
-                        if match_lower in jugador_lower or jugador_lower in match_lower:
-                            jugadores_coincidentes.append(jugador)
-                            break
-            
-            # Comprobación específica para nombres comunes (mapeo manual)
-            nombre_mapeo = {
-                'j_musso': ['Juan Musso', 'Musso'],
-                'gimenez': ['José María Giménez', 'Giménez', 'Jose M. Giménez', 'José Giménez'],
-                'gallagher': ['Connor Gallagher', 'Gallagher'],
-                'de_paul': ['Rodrigo De Paul', 'De Paul'],
-                'koke': ['Koke', 'Jorge Resurreccion', 'Jorge Resurrección'],
-                'p_barrios': ['Pablo Barrios', 'Barrios'],
-                'sorloth': ['Alexander Sorloth', 'Sorloth', 'Alexander Sørloth', 'Sørloth'],
-                'correa': ['Ángel Correa','Angel Correa', 'Correa'],
-                'lemar': ['Thomas Lemar', 'Lemar'],
-                'lino': ['Samuel Lino', 'Samu Lino', 'Lino'],
-                'oblak': ['Jan Oblak', 'Oblak'],
-                'Llorente': ['Marcos Llorente', 'Llorente'],
-                'lenglet': ['Clement Lenglet', 'Lenglet'],
-                'molina': ['Nahuel Molina', 'Molina'],
-                'riquelme': ['Rodrigo Riquelme', 'Riquelme'],
-                'j_alvarez': ['Julián Álvarez', 'Alvarez', 'J. Álvarez'],
-                'witsel': ['Axel Witsel', 'Witsel'],
-                'j_galan': ['Javi Galán', 'Galán', 'Javi Galan'],
-                'g_simeone': ['Giuliano Simeone', 'Simeone'],
-                'reinildo': ['Reinildo Mandava', 'Reinildo'],
-                'le_normand': ['Robin Le Normand', 'Le Normand'],
-                'a_niño': ['Adrián Niño', 'Adrian Niño', 'Niño'],
-                'i_kostis': ['Ilias Kostis', 'Kostis'],
-                'azpilicueta': ['César Azpilicueta', 'Azpilicueta', 'Cesar Azpilicueta', 'Azpilcueta']
-                # Añadir más mapeos según sea necesario
-            }
-            
-            # Si el usuario actual está en el mapeo, buscar coincidencias
-            if current_user.id in nombre_mapeo:
-                for posible_nombre in nombre_mapeo[current_user.id]:
-                    for jugador in jugadores:
-                        if posible_nombre.lower() in jugador.lower():
-                            if jugador not in jugadores_coincidentes:
-                                jugadores_coincidentes.append(jugador)                                
+            if id_usuario is not None:
+                jugadores_coincidentes = [jugador for jugador in jugadores
+                                          if indice.resolver_nombre(jugador) == id_usuario]
             
             # Si encontramos coincidencias, usarlas. Si no, mostrar mensaje
             if jugadores_coincidentes:
-                # Eliminar duplicados
-                jugadores_coincidentes = list(set(jugadores_coincidentes))
                 options = [{'label': jugador, 'value': jugador} for jugador in jugadores_coincidentes]
                 default_value = jugadores_coincidentes[0]  
 
@@ -585,93 +317,48 @@ def register_physical_data_callbacks(app):
         
         return options, default_value
     
-    # Callback para actualizar los datos del jugador cuando se selecciona uno nuevo
+    # Callback para actualizar los datos del jugador cuando se selecciona uno nuevo.
+    # Los datos se quedan en el servidor; el store solo guarda una referencia.
     @app.callback(
         Output('datos-jugador-store', 'data'),
-        [Input('jugador-fisico-dropdown', 'value')]
+        [Input('jugador-fisico-dropdown', 'value')],
+        [State('datos-jugador-store', 'data')]
     )
-    def actualizar_datos_jugador(nombre_jugador):
+    def actualizar_datos_jugador(nombre_jugador, referencia_anterior):
         if not nombre_jugador:
             return {}
         
-        # Verificar permisos si el usuario es un jugador
-        if current_user.is_authenticated and current_user.role == 'player':
-            # Usar el mismo mapeo que en el callback anterior para verificar permisos
-            nombre_mapeo = {
-                'j_musso': ['Juan Musso', 'Musso'],
-                'gimenez': ['José María Giménez', 'Giménez', 'Jose M. Giménez', 'José Giménez'],
-                'gallagher': ['Connor Gallagher', 'Gallagher'],
-                'de_paul': ['Rodrigo De Paul', 'De Paul'],
-                'koke': ['Koke', 'Jorge Resurreccion', 'Jorge Resurrección'],
-                'p_barrios': ['Pablo Barrios', 'Barrios'],
-                'sorloth': ['Alexander Sorloth', 'Sorloth', 'Alexander Sørloth', 'Sørloth'],
-                'correa': ['Ángel Correa','Angel Correa', 'Correa'],
-                'lemar': ['Thomas Lemar', 'Lemar'],
-                'lino': ['Samuel Lino', 'Samu Lino', 'Lino'],
-                'oblak': ['Jan Oblak', 'Oblak'],
-                'Llorente': ['Marcos Llorente', 'Llorente'],
-                'lenglet': ['Clement Lenglet', 'Lenglet'],
-                'molina': ['Nahuel Molina', 'Molina'],
-                'riquelme': ['Rodrigo Riquelme', 'Riquelme'],
-                'j_alvarez': ['Julián Álvarez', 'Alvarez', 'J. Álvarez'],
-                'witsel': ['Axel Witsel', 'Witsel'],
-                'j_galan': ['Javi Galán', 'Galán', 'Javi Galan'],
-                'g_simeone': ['Giuliano Simeone', 'Simeone'],
-                'reinildo': ['Reinildo Mandava', 'Reinildo'],
-                'le_normand': ['Robin Le Normand', 'Le Normand'],
-                'a_niño': ['Adrián Niño', 'Adrian Niño', 'Niño'],
-                'i_kostis': ['Ilias Kostis', 'Kostis'],
-                'azpilicueta': ['César Azpilicueta', 'Azpilicueta', 'Cesar Azpilicueta', 'Azpilcueta']
+        datos = cargar_datos_sesion(nombre_jugador)
+        if datos.get('restricted', False):
+            return datos
+        
+        # Sin almacén en el servidor: los datos viajan en formato columnar
+        if SESSION_STORE_CONFIG['datos_en_cliente']:
+            return {
+                'jugador': datos['jugador'],
+                'condicionales': codificar_columnar(datos['condicionales']),
+                'version': version_datos_fisicos()
             }
-            
-            permitido = False
-                        
-            # Verificar usando el mapeo
-            if current_user.id in nombre_mapeo:
-                for posible_nombre in nombre_mapeo[current_user.id]:
-                    # Normalizar ambos para comparación consistente
-                    posible_nombre_norm = normalize_name(posible_nombre)
-                    jugador_nombre_norm = normalize_name(nombre_jugador)
-                    
-                    # Verificar si hay coincidencia parcial en cualquier dirección
-                    if (posible_nombre_norm in jugador_nombre_norm or 
-                        jugador_nombre_norm in posible_nombre_norm):
-                        permitido = True
-                        break
-            
-            # Si no está permitido, devolver error
-            if not permitido:
-                # Intento adicional para caracteres especiales nórdicos
-                user_id_normalized = current_user.id.lower()
-                jugador_normalizado = normalize_name(nombre_jugador).replace(' ', '')
-                
-                # Verificación especial para Sørloth
-                if user_id_normalized == 'sorloth' and ('sorloth' in jugador_normalizado or 'srloth' in jugador_normalizado):
-                    permitido = True
-                                    
-                if not permitido:
-                    print(f"Acceso denegado: {current_user.id} intentó acceder a {nombre_jugador}")
-                    return {
-                        'error': 'No tienes permiso para ver estos datos',
-                        'restricted': True
-                    }
         
-        # Si tiene permisos, cargar datos normalmente
-        datos_jugador = cargar_datos_jugador(nombre_jugador)
-        datos_fisicos = cargar_datos_fisicos(nombre_jugador)
+        # Se reutiliza la clave de la pestaña para no acumular entradas
+        clave = (referencia_anterior or {}).get('clave') or nueva_clave()
+        usuario = current_user.get_id() if current_user.is_authenticated else None
+        version = version_datos_fisicos()
+        guardar_en_sesion(clave, usuario, version, datos)
         
-        return {
-            'jugador': datos_jugador,
-            'condicionales': datos_fisicos.to_dict('records') if not datos_fisicos.empty and not datos_fisicos.empty else []
-        }
+        return {'clave': clave, 'version': version, 'jugador': nombre_jugador}
     
-    # Callback para el gráfico de barras
+    # Callback para el gráfico de barras. Si solo cambian las métricas se
+    # envía un Patch con las trazas que cambian en lugar de la figura completa.
     @app.callback(
-        Output('grafico-barras-fisico', 'figure'),
+        [Output('grafico-barras-fisico', 'figure'),
+         Output('grafico-barras-fisico-estado', 'data')],
         [Input('datos-jugador-store', 'data'),
-         Input('metricas-barras-dropdown', 'value')]
+         Input('metricas-barras-dropdown', 'value')],
+        [State('grafico-barras-fisico-estado', 'data')]
     )
-    def actualizar_grafico_barras(datos, metricas_seleccionadas):
+    def actualizar_grafico_barras(datos, metricas_seleccionadas, estado):
+        datos = resolver_datos(datos)
         # Verificar si hay restricción de acceso primero
         if datos and datos.get('restricted', False):
             fig = go.Figure()
@@ -680,7 +367,7 @@ def register_physical_data_callbacks(app):
                 showarrow=False,
                 font=dict(size=20)
             )
-            return fig
+            return fig, None
         
         # Crear figura vacía por defecto
         fig = go.Figure()
@@ -692,10 +379,10 @@ def register_physical_data_callbacks(app):
                 showarrow=False,
                 font=dict(size=14)
             )
-            return fig
+            return fig, None
         
-        # Convertir a DataFrame
-        df = pd.DataFrame(datos['condicionales'])
+        # DataFrame compartido del almacén de sesión (no modificar in situ)
+        df = datos['condicionales']
         
         # Verificar si hay datos en el DataFrame
         if df.empty:
@@ -704,7 +391,7 @@ def register_physical_data_callbacks(app):
                 showarrow=False,
                 font=dict(size=14)
             )
-            return fig
+            return fig, None
         
         # Verificar que las métricas seleccionadas estén en el DataFrame
         metricas_disponibles = [m for m in metricas_seleccionadas if m in df.columns]
@@ -714,7 +401,7 @@ def register_physical_data_callbacks(app):
                 showarrow=False,
                 font=dict(size=14)
             )
-            return fig
+            return fig, None
         
         # Limitar a 3 métricas para no saturar el gráfico
         if len(metricas_disponibles) > 3:
@@ -723,20 +410,30 @@ def register_physical_data_callbacks(app):
         # Obtener nombre del jugador
         nombre_jugador = datos['jugador'].get('nombre', 'Jugador')
         
+        def crear_traza(i, metrica):
+            return traza_barras(
+                df['Jornada'].to_numpy(),
+                df[metrica].to_numpy(),
+                name=metrica.replace('_', ' ').title(),
+                marker=dict(color=px.colors.qualitative.G10[i % len(px.colors.qualitative.G10)])
+            )
+        
+        # Mismo jugador y otras métricas: solo se envían las trazas que cambian
+        if estado and dash.ctx.triggered_id == 'metricas-barras-dropdown':
+            if estado['metricas'] == metricas_disponibles:
+                return dash.no_update, dash.no_update
+            parche = parchear_trazas(Patch(), estado['metricas'], metricas_disponibles, crear_traza)
+            return parche, {'metricas': metricas_disponibles}
+        
         # Crear gráfico de barras
         for i, metrica in enumerate(metricas_disponibles):
-            fig.add_trace(go.Bar(
-                x=df['Jornada'],
-                y=df[metrica],
-                name=metrica.replace('_', ' ').title(),
-                marker_color=px.colors.qualitative.G10[i % len(px.colors.qualitative.G10)]
-            ))
+            fig.add_trace(crear_traza(i, metrica))
         
         # Actualizar layout
         fig.update_layout(
             xaxis_title="Jornada",
             yaxis_title="Valor",
-            template="plotly_white",
+            template=PLANTILLA,
             legend=dict(
                 orientation="h",
                 yanchor="bottom",
@@ -747,7 +444,7 @@ def register_physical_data_callbacks(app):
             margin=dict(l=40, r=40, t=60, b=40)
         )
         
-        return fig
+        return fig, {'metricas': metricas_disponibles}
     
     # Callback para el radar chart
     @app.callback(
@@ -756,6 +453,7 @@ def register_physical_data_callbacks(app):
          Input('metricas-radar-checklist', 'value')]
     )
     def actualizar_grafico_radar(datos, metricas_seleccionadas):
+        datos = resolver_datos(datos)
         # Verificar si hay restricción de acceso primero
         if datos and datos.get('restricted', False):
             fig = go.Figure()
@@ -778,8 +476,8 @@ def register_physical_data_callbacks(app):
             )
             return fig
         
-        # Convertir a DataFrame
-        df = pd.DataFrame(datos['condicionales'])
+        # DataFrame compartido del almacén de sesión (no modificar in situ)
+        df = datos['condicionales']
         
         # Verificar si hay datos en el DataFrame
         if df.empty:
@@ -808,33 +506,36 @@ def register_physical_data_callbacks(app):
         nombre_jugador = datos['jugador'].get('nombre', 'Jugador')
         
         try:
-            # Calcular promedios
-            df_promedio = df[metricas_disponibles].mean().reset_index()
-            df_promedio.columns = ['metrica', 'valor']
-            
-            # Normalizar datos para el radar
-            df_otras_posiciones = pd.DataFrame()
-            for metrica in metricas_disponibles:
-                df_otras_posiciones[metrica] = [df[metrica].mean() * 0.8]  
-            
-            # Normalizar valores
-            df_normalizado = pd.DataFrame()
-            for metrica in metricas_disponibles:
-                max_val = df[metrica].max() * 1.2  
-                min_val = 0
-                if max_val > min_val:
-                    df_normalizado.loc[0, metrica] = df[metrica].mean() / max_val
-                    df_normalizado.loc[1, metrica] = df_otras_posiciones[metrica].iloc[0] / max_val
-                else:
-                    df_normalizado.loc[0, metrica] = 0
-                    df_normalizado.loc[1, metrica] = 0
+            # Medias del jugador y referencia real de su posición (resumen materializado)
+            valores = df[metricas_disponibles].to_numpy(dtype=float)
+            medias_jugador = np.nanmean(valores, axis=0)
+            referencia = obtener_referencia_posicion(datos['jugador'].get('posicion'), metricas_disponibles)
+            if referencia is not None:
+                medias_posicion = referencia['Media']
+                p90_posicion = referencia['P90']
+                nombre_referencia = ('Promedio plantilla' if referencia['posicion'] == POSICION_TODAS
+                                     else f"Promedio por posición ({referencia['posicion']})")
+            else:
+                medias_posicion = p90_posicion = np.full(len(metricas_disponibles), np.nan)
+                nombre_referencia = 'Promedio por posición'
+            
+            # Normalizar todo el vector de métricas de una vez: escala común por
+            # métrica = 1.2 x el mayor entre el máximo del jugador y el p90 de la posición
+            escala = np.fmax(np.nanmax(valores, axis=0), p90_posicion) * 1.2
+            con_escala = escala > 0
+            r_jugador = np.zeros(len(metricas_disponibles))
+            r_posicion = np.zeros(len(metricas_disponibles))
+            r_jugador[con_escala] = medias_jugador[con_escala] / escala[con_escala]
+            r_posicion[con_escala] = medias_posicion[con_escala] / escala[con_escala]
+            r_jugador = np.nan_to_num(r_jugador)
+            r_posicion = np.nan_to_num(r_posicion)
             
             # Crear figura de radar
             categories = [m.replace('_', ' ').title() for m in metricas_disponibles]
             
             # Crear radr chart
             fig.add_trace(go.Scatterpolar(
-                r=df_normalizado.iloc[0].values.tolist(),
+                r=r_jugador.tolist(),
                 theta=categories,
                 fill='toself',
                 name=nombre_jugador,
@@ -842,10 +543,10 @@ def register_physical_data_callbacks(app):
             ))
             
             fig.add_trace(go.Scatterpolar(
-                r=df_normalizado.iloc[1].values.tolist(),
+                r=r_posicion.tolist(),
                 theta=categories,
                 fill='toself',
-                name='Promedio por posición',
+                name=nombre_referencia,
                 line_color='rgba(216, 30, 5, 0.7)'
             ))
             
@@ -856,7 +557,7 @@ def register_physical_data_callbacks(app):
                         range=[0, 1]
                     )
                 ),
-                template="plotly_white",
+                template=PLANTILLA,
                 legend=dict(
                     orientation="h",
                     yanchor="bottom",
@@ -885,6 +586,7 @@ def register_physical_data_callbacks(app):
          Input('scatter-size-dropdown', 'value')]
     )
     def actualizar_grafico_scatter(datos, metrica_x, metrica_y, metrica_size):
+        datos = resolver_datos(datos)
         # Verificar si hay restricción de acceso primero
         if datos and datos.get('restricted', False):
             fig = go.Figure()
@@ -907,8 +609,8 @@ def register_physical_data_callbacks(app):
             )
             return fig
         
-        # Convertir a DataFrame
-        df = pd.DataFrame(datos['condicionales'])
+        # DataFrame compartido del almacén de sesión (no modificar in situ)
+        df = datos['condicionales']
         
         # Verificar si hay datos en el DataFrame
         if df.empty:
@@ -932,50 +634,11 @@ def register_physical_data_callbacks(app):
         nombre_jugador = datos['jugador'].get('nombre', 'Jugador')
         
         try:
-            # Crear scatter plot
-            fig = px.scatter(
-                df,
-                x=metrica_x,
-                y=metrica_y,
-                size=metrica_size,
-                color="Jornada",
-                hover_name="Jornada",
-                size_max=30,
-                color_continuous_scale=px.colors.sequential.Blues
-            )
-            
-            # Modificar layout
-            fig.update_layout(
-                xaxis_title=metrica_x.replace('_', ' ').title(),
-                yaxis_title=metrica_y.replace('_', ' ').title(),
-                coloraxis_colorbar_title="Jornada",
-                template="plotly_white",
-                margin=dict(l=40, r=40, t=60, b=40)
-            )
-            
-            # Añadir líneas de tendencia (manejo de error mejorado)
-            try:
-                # Verificar si hay suficientes puntos para ajustar
-                if len(df) > 2 and len(df[metrica_x].unique()) > 1:
-                    # Calcular línea de tendencia
-                    z = np.polyfit(df[metrica_x], df[metrica_y], 1)
-                    p = np.poly1d(z)
-                    x_range = np.linspace(df[metrica_x].min(), df[metrica_x].max(), 100)
-                    
-                    fig.add_trace(
-                        go.Scatter(
-                            x=x_range,
-                            y=p(x_range),
-                            mode='lines',
-                            line=dict(color='rgba(0, 0, 0, 0.5)', dash='dash'),
-                            showlegend=False
-                        )
-                    )
-            except Exception as e:
-                print(f"Error en línea de tendencia: {e}")
-                # No añadir línea de tendencia si hay error
+            # Crear scatter plot con línea de tendencia
+            fig = crear_grafico_scatter_fisico(df, metrica_x, metrica_y, metrica_size)
         except Exception as e:
             print(f"Error en scatter plot: {e}")
+            fig = go.Figure()
             fig.add_annotation(
                 text=f"Error al generar scatter plot: {str(e)}",
                 showarrow=False,
@@ -992,6 +655,7 @@ def register_physical_data_callbacks(app):
         Input('metricas-table-dropdown', 'value')]
     )
     def actualizar_tabla_datos(datos, metricas_seleccionadas):
+        datos = resolver_datos(datos)
         # Configuración de estilos base que siempre se aplican
         style_data_conditional = [
             # Filas alternadas con color de fondo diferente
@@ -1020,104 +684,15 @@ def register_physical_data_callbacks(app):
             data = [{'mensaje': 'Seleccione un jugador y métricas para visualizar'}]
             return columns, data, style_data_conditional
         
-        # Convertir a DataFrame
-        df = pd.DataFrame(datos['condicionales'])
-        
-        # Definir las columnas base (siempre mostrar Jornada primero)
-        columns = [{'name': 'Jornada', 'id': 'Jornada'}]
+        # DataFrame compartido del almacén de sesión (no modificar in situ)
+        df = datos['condicionales']
         
-        # Añadir columnas para cada métrica seleccionada
-        for metrica in metricas_seleccionadas:
-            nombre_metrica = metrica.replace('_', ' ').title()
-            columns.append({'name': nombre_metrica, 'id': metrica})
+        # Columnas (Jornada primero) y datos numéricos preparados por columnas
+        columns = columnas_tabla(df, metricas_seleccionadas)
+        data = formatear_tabla(df, metricas_seleccionadas)
         
-        # Preparar los datos
-        data = []
-        for i, row in df.iterrows():
-            data_row = {'Jornada': str(row['Jornada'])}
-            for metrica in metricas_seleccionadas:
-                if metrica in row:
-                    # Formatear valores numéricos
-                    if pd.api.types.is_numeric_dtype(df[metrica]):
-                        data_row[metrica] = f"{row[metrica]:.1f}" if isinstance(row[metrica], float) else str(row[metrica])
-                    else:
-                        data_row[metrica] = str(row[metrica])
-            data.append(data_row)
-        
-        # Diccionario para almacenar referencias a los valores máximos y mínimos por métrica
-        max_min_values = {}
-        
-        # Aplicar estilos para destacar valores máximos y mínimos
-        for metrica in metricas_seleccionadas:
-            if metrica in df.columns and pd.api.types.is_numeric_dtype(df[metrica]):
-                try:
-                    # Encontrar valores máximos y mínimos
-                    serie_metrica = df[metrica]
-                    serie_sin_na = serie_metrica.dropna()
-                    
-                    if not serie_sin_na.empty:
-                        max_value = serie_sin_na.max()
-                        min_value = serie_sin_na.min()
-                        
-                        # Guardamos estos valores para referenciarlos después
-                        max_min_values[metrica] = {'max': max_value, 'min': min_value}
-                        
-                        # Estilo para valores máximos
-                        style_data_conditional.append({
-                            'if': {
-                                'column_id': metrica,
-                                'filter_query': f'{{{metrica}}} = "{max_value:.1f}"' if isinstance(max_value, float) else f'{{{metrica}}} = "{max_value}"'
-                            },
-                            'backgroundColor': 'rgba(76, 175, 80, 0.8)',
-                            'fontWeight': 'bold',
-                            'color': 'white'
-                        })
-                        
-                        # Estilo para valores mínimos
-                        if min_value != max_value:
-                            style_data_conditional.append({
-                                'if': {
-                                    'column_id': metrica,
-                                    'filter_query': f'{{{metrica}}} = "{min_value:.1f}"' if isinstance(min_value, float) else f'{{{metrica}}} = "{min_value}"'
-                                },
-                                'backgroundColor': 'rgba(244, 67, 54, 0.8)',
-                                'fontWeight': 'bold',
-                                'color': 'white'
-                            })
-                        
-                        # Calcular rangos para valores intermedios
-                        rango = max_value - min_value
-                        if rango > 0:
-                            # Valores altos (75% del rango o más)
-                            umbral_alto = min_value + (rango * 0.75)
-                            valor_alto_formateado = f"{umbral_alto:.1f}" if isinstance(umbral_alto, float) else str(umbral_alto)
-                            max_formateado = f"{max_value:.1f}" if isinstance(max_value, float) else str(max_value)
-                            
-                            style_data_conditional.append({
-                                'if': {
-                                    'column_id': metrica,
-                                    'filter_query': f'{{{metrica}}} >= "{valor_alto_formateado}" && {{{metrica}}} < "{max_formateado}"'
-                                },
-                                'backgroundColor': 'rgba(76, 175, 80, 0.4)',
-                                'color': 'white'
-                            })
-                            
-                            # Valores bajos (25% del rango o menos)
-                            umbral_bajo = min_value + (rango * 0.25)
-                            valor_bajo_formateado = f"{umbral_bajo:.1f}" if isinstance(umbral_bajo, float) else str(umbral_bajo)
-                            min_formateado = f"{min_value:.1f}" if isinstance(min_value, float) else str(min_value)
-                            
-                            style_data_conditional.append({
-                                'if': {
-                                    'column_id': metrica,
-                                    'filter_query': f'{{{metrica}}} <= "{valor_bajo_formateado}" && {{{metrica}}} > "{min_formateado}"'
-                                },
-                                'backgroundColor': 'rgba(244, 67, 54, 0.4)',
-                                'color': 'white'
-                            })
-                except Exception as e:
-                    print(f"Error al procesar estilos para métrica {metrica}: {e}")
-                    continue
+        # Destacar máximo, mínimo y bandas por cuantiles con reglas numéricas
+        style_data_conditional.extend(reglas_formato_condicional(df, metricas_seleccionadas))
 
         return columns, data, style_data_conditional
     
@@ -1136,7 +711,8 @@ def register_physical_data_callbacks(app):
         if not n_clicks:
             return None, ""
     
-        if not datos:
+        datos = resolver_datos(datos)
+        if not datos or 'jugador' not in datos:
             return None, html.Span("No hay datos del jugador", className="ms-2 fw-bold", style={"color": "#FF0000"})
         
         try:
@@ -1,41 +1,66 @@
 import dash
 from dash.dependencies import Input, Output, State
-from dash import html, dcc
-import pandas as pd
-from utils.data_viz import format_stat_name, crear_grafico_linea, crear_grafico_barras, crear_grafico_histograma, crear_grafico_scatter
+from dash import html, dcc, Patch
+from utils.data_viz import (format_stat_name, crear_grafico_linea, crear_grafico_barras, crear_grafico_histograma,
+                            crear_grafico_scatter, traza_linea_jugador, parchear_trazas)
 from utils.pdf_export import exportar_pdf, exportar_pdf_stats
 from layouts.player_stats_layout import colores_jugadores, colores_por_posicion
+from utils.match_stats_store import (obtener_estadisticas_partido, obtener_cubo_estadisticas,
+                                     obtener_particion_jornadas, obtener_version_estadisticas)
+from utils.figure_cache import figura_en_cache
 
 def register_player_stats_callbacks(app):
     """
     Registra los callbacks para la página de estadísticas de jugadores
     """
     try:
-        # Cargar datos de jugadores
-        df = pd.read_csv('data/players_atm_x_jorna_24_25.csv')
-        
-        # Callback para actualizar el dropdown de jugadores según la posición seleccionada
-        @app.callback(
-            Output('jugadores-dropdown', 'options'),
-            [Input('posicion-dropdown', 'value')]
-        )
-        def actualizar_jugadores_dropdown(posicion_seleccionada):
-            if posicion_seleccionada == 'TODAS':
-                jugadores_filtrados = sorted(df['Nombre'].unique())
-            else:
-                jugadores_filtrados = sorted(df[df['Posicion'] == posicion_seleccionada]['Nombre'].unique())
-            
-            return [{'label': jugador, 'value': jugador} for jugador in jugadores_filtrados]
-        
-        # Callback para actualizar el gráfico de línea
+        # Callback para actualizar el gráfico de línea. Si solo cambia la
+        # métrica o el grupo de jugadores se envía un Patch con las trazas
+        # afectadas en lugar de la figura completa.
         @app.callback(
-            Output('grafico-linea', 'figure'),
+            [Output('grafico-linea', 'figure'),
+             Output('grafico-linea-estado', 'data')],
             [Input('jugadores-dropdown', 'value'),
-             Input('metrica-evolucion-dropdown', 'value')]
+             Input('metrica-evolucion-dropdown', 'value')],
+            [State('grafico-linea-estado', 'data')]
         )
-        def actualizar_grafico_linea(jugadores_seleccionados, metrica):
-            rango_jornadas = [df['Jornada'].min(), df['Jornada'].max()]
-            return crear_grafico_linea(df, rango_jornadas, jugadores_seleccionados, metrica, colores_jugadores)
+        def actualizar_grafico_linea(jugadores_seleccionados, metrica, estado):
+            cubo = obtener_cubo_estadisticas()
+            version = obtener_version_estadisticas()
+            rango_jornadas = [cubo.jornadas[0], cubo.jornadas[-1]]
+
+            # Trazas que tendrá la figura: jugadores con datos en el rango
+            series = {}
+            if jugadores_seleccionados and metrica and cubo.tiene_metrica(metrica):
+                for jugador in jugadores_seleccionados:
+                    serie = cubo.serie_jugador(jugador, metrica, rango_jornadas)
+                    if serie is not None:
+                        series[jugador] = serie
+            trazas = list(series)
+            nuevo_estado = {'version': list(version), 'metrica': metrica, 'trazas': trazas} if trazas else None
+
+            def crear_traza(i, jugador):
+                jornadas, valores = series[jugador]
+                return traza_linea_jugador(jornadas, valores, jugador, colores_jugadores.get(jugador, '#000000'))
+
+            if estado and trazas and estado['version'] == list(version):
+                if estado['metrica'] == metrica:
+                    if estado['trazas'] == trazas:
+                        return dash.no_update, dash.no_update
+                    return parchear_trazas(Patch(), estado['trazas'], trazas, crear_traza), nuevo_estado
+                if estado['trazas'] == trazas:
+                    # Misma figura con otra métrica: solo cambian las y y los títulos
+                    parche = Patch()
+                    for i, jugador in enumerate(trazas):
+                        parche['data'][i]['y'] = series[jugador][1]
+                    parche['layout']['title']['text'] = f"{format_stat_name(metrica)} por Jornada"
+                    parche['layout']['yaxis']['title']['text'] = format_stat_name(metrica)
+                    return parche, nuevo_estado
+
+            def generar():
+                return crear_grafico_linea(cubo, rango_jornadas, jugadores_seleccionados, metrica, colores_jugadores)
+            fig = figura_en_cache('linea', (jugadores_seleccionados, metrica), version, generar)
+            return fig, nuevo_estado
         
         # Callback para actualizar el gráfico de barras
         @app.callback(
@@ -44,7 +69,9 @@ def register_player_stats_callbacks(app):
              Input('metrica-barras-dropdown', 'value')]
         )
         def actualizar_grafico_barras(jornada_seleccionada, metrica):
-            return crear_grafico_barras(df, jornada_seleccionada, metrica)
+            def generar():
+                return crear_grafico_barras(obtener_particion_jornadas(), jornada_seleccionada, metrica)
+            return figura_en_cache('barras', (jornada_seleccionada, metrica), obtener_version_estadisticas(), generar)
         
         # Callback para actualizar el histograma
         @app.callback(
@@ -52,8 +79,11 @@ def register_player_stats_callbacks(app):
             [Input('metrica-histograma-dropdown', 'value')]
         )
         def actualizar_grafico_histograma(metrica):
-            rango_jornadas = [df['Jornada'].min(), df['Jornada'].max()]
-            return crear_grafico_histograma(df, rango_jornadas, metrica)
+            def generar():
+                cubo = obtener_cubo_estadisticas()
+                rango_jornadas = [cubo.jornadas[0], cubo.jornadas[-1]]
+                return crear_grafico_histograma(cubo, rango_jornadas, metrica)
+            return figura_en_cache('histograma', (metrica,), obtener_version_estadisticas(), generar)
         
         # Callback para actualizar el scatter plot
         @app.callback(
@@ -63,7 +93,11 @@ def register_player_stats_callbacks(app):
              Input('metrica-y-dropdown', 'value')]
         )
         def actualizar_grafico_scatter(jornada_seleccionada, metrica_x, metrica_y):
-            return crear_grafico_scatter(df, jornada_seleccionada, metrica_x, metrica_y, colores_por_posicion)
+            def generar():
+                return crear_grafico_scatter(obtener_particion_jornadas(), jornada_seleccionada,
+                                             metrica_x, metrica_y, colores_por_posicion)
+            return figura_en_cache('scatter', (jornada_seleccionada, metrica_x, metrica_y),
+                                   obtener_version_estadisticas(), generar)
         
         # Callback para exportar PDF de estadísticas
         @app.callback(
@@ -83,6 +117,7 @@ def register_player_stats_callbacks(app):
             
             try:
                 # Definir el rango de jornadas dentro de la función
+                df = obtener_estadisticas_partido()
                 rango_jornadas = [df['Jornada'].min(), df['Jornada'].max()]
 
                 # Usar directamente las figuras actuales que se muestran en la interfaz
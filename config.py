@@ -41,7 +41,57 @@ GRAPH_STYLE = {
   'minWidth': '300px'
 }
 
+# Rutas de los ficheros de datos
+DATA_CONFIG = {
+    "match_stats_path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "players_atm_x_jorna_24_25.csv"),
+    "master_path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jugadores_master.csv")
+}
+
 # Configuración de la base de datos
 DB_CONFIG = {
-    "db_path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "atm_login.db")
+    "db_path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "atm_login.db"),
+    "condic_db_path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ATM_condic_24_25.db"),
+    "temporada": "24_25",
+    "resumen_dir": os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "resumenes")  # BD de caché con los resúmenes materializados
+}
+
+# Configuración de los heatmaps (Sofascore y caché en disco)
+HEATMAP_CONFIG = {
+    "torneo": 8,            # LaLiga en Sofascore
+    "temporada": 61643,     # Temporada 24/25 en Sofascore
+    "motor": "matplotlib",  # Motor de renderizado: 'matplotlib' o 'pillow' (más rápido)
+    "cache_dir": os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "heatmaps"),
+    "cache_ttl": 24 * 3600,               # Segundos que una imagen se considera vigente
+    "cache_max_bytes": 50 * 1024 * 1024,  # Tamaño máximo de la caché antes de expulsar (LRU)
+    "http_max_age": 3600,                 # Cache-Control del endpoint /heatmap (segundos)
+    "miniatura_ancho": 480,               # Ancho en píxeles de la variante ?variante=miniatura
+    "miniatura_calidad": 80,              # Calidad WebP de la miniatura
+    "precarga_hilos": 4,                  # Jugadores procesados a la vez en la precarga
+    "render_en_pool": True,               # Dibujar en un pool de procesos (fuera del hilo de Flask)
+    "render_procesos": max(1, min(4, (os.cpu_count() or 2) - 1)),  # Procesos del pool de render
+    "render_cola_max": 8,                 # Renders pendientes antes de degradar a caché/simulado
+    "render_timeout": 20                  # Segundos máximos de espera por render
+}
+
+# Cliente HTTP de la API de Sofascore
+SOFASCORE_CONFIG = {
+    "base_url": os.environ.get("SOFASCORE_BASE_URL", "https://www.sofascore.com/api/v1"),  # Se puede apuntar a un servidor local de pruebas
+    "timeout": (3.05, 10),       # Segundos (conexión, lectura) por petición
+    "reintentos": 3,             # Reintentos ante errores de red, 429 y 5xx
+    "backoff": 0.5,              # Espera base entre reintentos (se duplica en cada uno)
+    "espera_max": 5,             # Espera máxima entre reintentos; si Retry-After pide más, se abandona
+    "peticiones_por_segundo": 2, # Ritmo sostenido del limitador (token bucket)
+    "rafaga": 4,                 # Peticiones seguidas permitidas antes de limitar
+    "conexiones": 10             # Conexiones keep-alive reutilizables en el pool
+}
+
+# Caché en memoria de figuras de Plotly ya serializadas
+FIGURE_CACHE_CONFIG = {
+    "max_entradas": 256  # Figuras guardadas antes de expulsar la menos usada (LRU)
+}
+
+# Almacén en memoria de los datos de cada sesión (el navegador solo guarda una clave)
+SESSION_STORE_CONFIG = {
+    "max_entradas": 256,       # Sesiones guardadas antes de expulsar la menos usada (LRU)
+    "datos_en_cliente": False  # True: enviar los datos al navegador en formato columnar en lugar de una clave
 }
\ No newline at end of file
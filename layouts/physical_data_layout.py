@@ -2,13 +2,13 @@ import dash
 import dash_bootstrap_components as dbc
 from dash import html, dcc, dash_table
 import pandas as pd
-import sqlite3
 import os
-import unicodedata
 from utils.auth import protect_route
 from flask_login import current_user
 from utils.pdf_export import exportar_pdf, crear_boton_exportar_pdf, crear_boton_exportar_pdf_fisico
-from config import CONFIG
+from config import CONFIG, DB_CONFIG
+from utils.physical_db import existe_tabla_datos_fisicos, obtener_metricas_fisicas, obtener_nombres_jugadores
+from utils.player_identity import normalize_name, corregir_codificacion
 
 @protect_route(['view_team', 'view_all'])
 def physical_data_layout():
@@ -16,116 +16,27 @@ def physical_data_layout():
     Layout para el dashboard de datos físicos/condicionales de jugadores
     """
     try:
-        # Función para normalizar nombres
-        def normalize_name(name):
-            if not name:
-                return ""
-            return ' '.join(unicodedata.normalize('NFKD', str(name).lower())
-                            .encode('ASCII', 'ignore')
-                            .decode('ASCII')
-                            .split())
-        
-        # Verificar qué columnas tenemos en el archivo maestro
-        if os.path.exists('data/jugadores_master.csv'):
-            # Leer con el separador correcto (punto y coma)
-            jugadores_master = pd.read_csv('data/jugadores_master.csv', sep=';')
-        else:
-            # Crear archivo maestro con los datos proporcionados
-            jugadores_master = pd.DataFrame({...})
-            # Guardar con separador punto y coma
-            jugadores_master.to_csv('data/jugadores_master.csv', sep=';', index=False)
-        
-        # Conectar a la base de datos de datos condicionales
-        db_path = 'data/ATM_condic_24_25.db'
+        # Comprobar la base de datos de datos condicionales
+        db_path = DB_CONFIG['condic_db_path']
         if not os.path.exists(db_path):
             
             return html.Div([
                 html.H1("Error: Base de datos no encontrada", className="text-center text-danger mb-4"),
                 html.P(f"No se encontró la base de datos en: {db_path}", className="text-center")
             ])
-            
-        conn = sqlite3.connect(db_path)
-        
-        # Verificar la estructura de la base de datos
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        tables_list = [table[0] for table in tables]
         
         # Verificar si existe la tabla datos_fisicos
-        if 'datos_fisicos' not in tables_list:
-            conn.close()
+        if not existe_tabla_datos_fisicos():
             return html.Div([
                 html.H1("Error: Tabla no encontrada", className="text-center text-danger mb-4"),
                 html.P(f"No se encontró la tabla 'datos_fisicos' en la base de datos", className="text-center")
             ])
         
-        # Obtener lista de jugadores que tienen datos condicionales
-        jugadores_con_datos = pd.read_sql("SELECT DISTINCT Nombre FROM datos_fisicos", conn)
-        
         # Obtener las métricas disponibles en la base de datos
-        metricas_query = """
-        SELECT name FROM pragma_table_info('datos_fisicos')
-        WHERE name NOT IN ('id', 'Jornada', 'Nombre', 'Posicion', 'Min', 'Edad')
-        """
-        metricas_df = pd.read_sql(metricas_query, conn)
-        metricas_fisicas = metricas_df['name'].tolist()
-        
-        # Cargar datos de los jugadores
-        jugadores_db = pd.read_sql("SELECT DISTINCT Nombre as nombre, Posicion as posicion, Edad as edad FROM datos_fisicos", conn)
-        conn.close()
-        
-        # Cargar o crear archivo maestro
-        if os.path.exists('data/jugadores_master.csv'):
-            jugadores_master = pd.read_csv('data/jugadores_master.csv')
-
-        else:
-            # Crear archivo maestro con los datos proporcionados
-            jugadores_master = pd.DataFrame({
-                'nombre_completo': [
-                    'Juan Musso', 'José María Giménez', 'César Azpilicueta', 'Conor Gallagher', 
-                    'Rodrigo De Paul', 'Koke', 'Antoine Griezmann', 'Pablo Barrios', 
-                    'Alexander Sørloth', 'Ángel Correa', 'Thomas Lemar', 'Samuel Lino', 
-                    'Jan Oblak', 'Marcos Llorente', 'Clément Lenglet', 'Nahuel Molina', 
-                    'Rodrigo Riquelme', 'Julián Álvarez', 'Axel Witsel', 'Javi Galán', 
-                    'Giuliano Simeone', 'Reinildo Mandava', 'Robin Le Normand', 'Adrián Niño'
-                ],
-                'short_name': [
-                    'Musso', 'Giménez', 'Azpilicueta', 'Gallagher', 'De Paul', 'Koke', 
-                    'Griezmann', 'Barrios', 'Sorloth', 'Correa', 'Lemar', 'Lino', 
-                    'Oblak', 'Llorente', 'Lenglet', 'Molina', 'Riquelme', 'Julián', 
-                    'Witsel', 'Galán', 'Giuliano', 'Reinildo', 'Le Normand', 'Niño'
-                ],
-                'id_sofascore': [
-                    263651, 325355, 21555, 904970, 249399, 84539, 85859, 1142588, 
-                    309078, 316152, 191182, 874705, 69768, 353138, 580550, 831799, 
-                    989113, 944656, 35612, 825133, 1099352, 831424, 787751, 1402927
-                ],
-                'pais': ['ARG', 'URY', 'ESP', 'ENG', 'ARG', 'ESP', 'FRA', 'ESP', 
-                       'NOR', 'ARG', 'FRA', 'BRA', 'SVN', 'ESP', 'FRA', 'ARG', 
-                       'ESP', 'ARG', 'BEL', 'ESP', 'ARG', 'MOZ', 'FRA', 'ESP']
-            })
-            
-            # Añadir rutas de fotos
-            jugadores_master['ruta_foto'] = [f'/assets/players/{i}.png' for i in range(1, 25)]
-            
-            # Guardar archivo
-            os.makedirs('data', exist_ok=True)
-            jugadores_master.to_csv('data/jugadores_master.csv', index=False)
+        metricas_fisicas = obtener_metricas_fisicas()
         
-        # Crear diccionario para mapear nombres
-        # Normalizar nombres para comparación
-        nombre_dict = {}
-        for _, row in jugadores_master.iterrows():
-            # Verificar si 'short_name' existe en la columna antes de acceder a ella
-            if 'short_name' in jugadores_master.columns:
-                nombre_db_norm = normalize_name(str(row['short_name']))
-                nombre_dict[nombre_db_norm] = {
-                    'nombre_completo': row['nombre_completo'] if 'nombre_completo' in jugadores_master.columns else '',
-                    'id_sofascore': row['id_sofascore'] if 'id_sofascore' in jugadores_master.columns else None,
-                    'ruta_foto': row['ruta_foto'] if 'ruta_foto' in jugadores_master.columns else None,
-                    'pais': row['pais'] if 'pais' in jugadores_master.columns else 'ESP'
-                }
+        # Cargar los jugadores con datos condicionales
+        jugadores_db = pd.DataFrame({'nombre': obtener_nombres_jugadores()})
         
         # Crear opciones para el dropdown
         options = []
@@ -143,10 +54,7 @@ def physical_data_layout():
             unique_values.add(nombre_original)
     
             # Intentar corregir caracteres especiales
-            try:
-                nombre_mostrar = nombre_original.encode('latin1').decode('utf-8')
-            except:
-                nombre_mostrar = nombre_original
+            nombre_mostrar = corregir_codificacion(nombre_original)
         
             options.append({'label': nombre_mostrar, 'value': nombre_original})
     
@@ -415,6 +323,8 @@ def physical_data_layout():
                 ], width=12)
             ]),
             dcc.Store(id='datos-jugador-store'),
+            # Métricas dibujadas en el gráfico de barras (para actualizar con Patch)
+            dcc.Store(id='grafico-barras-fisico-estado'),
         ])
     except Exception as e:
         import traceback
@@ -1,9 +1,9 @@
 import dash_bootstrap_components as dbc
 from dash import html, dcc
-import pandas as pd
 from utils.auth import protect_route
 from config import CONFIG
 from utils.pdf_export import exportar_pdf, crear_boton_exportar_pdf
+from utils.match_stats_store import obtener_estadisticas_partido
 
 @protect_route(['view_team', 'view_all'])
 def player_stats_layout():
@@ -11,8 +11,8 @@ def player_stats_layout():
     Layout para el dashboard de estadísticas de jugadores
     """
     try:
-        # Cargar datos de jugadores
-        df = load_team_data('data/players_atm_x_jorna_24_25.csv')
+        # Datos de jugadores desde el almacén compartido
+        df = obtener_estadisticas_partido()
         
         # Obtener posiciones únicas
         posiciones = sorted(df['Posicion'].unique())
@@ -20,6 +20,13 @@ def player_stats_layout():
         # Obtener lista de jugadores
         todos_jugadores = sorted(df['Nombre'].unique())
         
+        # Mapa posición -> jugadores para el filtro del dropdown (en el navegador)
+        jugadores_por_posicion = {
+            posicion: sorted(nombres)
+            for posicion, nombres in df.groupby('Posicion', observed=True)['Nombre'].unique().items()
+        }
+        jugadores_por_posicion['TODAS'] = todos_jugadores
+        
         # Jugadores iniciales
         jugadores_iniciales = [j for j in jugadores_predeterminados if j in todos_jugadores]
         if not jugadores_iniciales:
@@ -66,6 +73,7 @@ def player_stats_layout():
                                             multi=True,
                                             className="mb-2"
                                         ),
+                                        dcc.Store(id='jugadores-por-posicion-store', data=jugadores_por_posicion),
                                     ], width=8),
                                 ]),
                             ]),
@@ -76,6 +84,8 @@ def player_stats_layout():
                                     type="circle",
                                     children=dcc.Graph(id='grafico-linea', style={"height": "450px"})
                                 ),
+                                # Jugadores y métrica dibujados (para actualizar con Patch)
+                                dcc.Store(id='grafico-linea-estado'),
                                 # Selector de métrica debajo del gráfico
                                 html.Div([
                                     html.Label("Métrica:", className="me-2 mt-3 fw-semibold fs-6"),
@@ -234,17 +244,9 @@ def player_stats_layout():
 
 def load_team_data(file_path):
     """
-    Carga datos del CSV del equipo con manejo de errores
+    Carga datos del CSV del equipo con manejo de errores (vía almacén compartido)
     """
-    try:
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
-        raise Exception(f"El archivo '{file_path}' no fue encontrado.")
-    except pd.errors.EmptyDataError:
-        raise Exception('El archivo de datos está vacío.')
-    except pd.errors.ParserError:
-        raise Exception('Error al analizar el archivo de datos.')
-    return df
+    return obtener_estadisticas_partido(file_path)
 
 def format_stat_name(stat_name):
     """
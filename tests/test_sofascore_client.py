@@ -0,0 +1,138 @@
+# tests/test_sofascore_client.py
+"""
+Pruebas del cliente de Sofascore contra un servidor local de pruebas:
+limitador de tasa, reintentos, Retry-After y agrupación de peticiones.
+
+Uso (desde la raíz del proyecto): python -m pytest tests
+"""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sofascore_client import ClienteSofascore
+
+class ServidorPruebas:
+    """
+    Servidor HTTP local. Cada ruta tiene una lista de respuestas
+    (codigo, cabeceras, cuerpo, retraso) que se sirven en orden; la última
+    se repite. Cuenta las peticiones recibidas por ruta.
+    """
+    def __init__(self):
+        self.respuestas = {}
+        self.peticiones = {}
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                ruta = self.path.lstrip('/')
+                with servidor._lock:
+                    n = servidor.peticiones.get(ruta, 0)
+                    servidor.peticiones[ruta] = n + 1
+                    lista = servidor.respuestas.get(ruta, [(200, {}, {'ruta': ruta}, 0)])
+                    codigo, cabeceras, cuerpo, retraso = lista[min(n, len(lista) - 1)]
+                time.sleep(retraso)
+                contenido = json.dumps(cuerpo).encode('utf-8')
+                self.send_response(codigo)
+                for nombre, valor in cabeceras.items():
+                    self.send_header(nombre, valor)
+                self.send_header('Content-Length', str(len(contenido)))
+                self.end_headers()
+                self.wfile.write(contenido)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def cerrar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorPruebas()
+    yield servidor
+    servidor.cerrar()
+
+def crear_cliente(servidor, **kwargs):
+    opciones = dict(base_url=servidor.url, timeout=(1, 2), reintentos=3, backoff=0.01,
+                    peticiones_por_segundo=1000, rafaga=1000, espera_max=2)
+    opciones.update(kwargs)
+    return ClienteSofascore(**opciones)
+
+def test_limitador_de_tasa(servidor):
+    cliente = crear_cliente(servidor, peticiones_por_segundo=10, rafaga=2)
+    inicio = time.perf_counter()
+    for i in range(6):
+        assert cliente.obtener_json(f"jugador/{i}") == {'ruta': f"jugador/{i}"}
+    # 2 de ráfaga y 4 a 10 por segundo: al menos ~0.4 s
+    assert time.perf_counter() - inicio >= 0.35
+
+def test_reintenta_errores_5xx(servidor):
+    servidor.respuestas['inestable'] = [(503, {}, {}, 0), (502, {}, {}, 0), (200, {}, {'ok': 1}, 0)]
+    cliente = crear_cliente(servidor)
+    assert cliente.obtener_json('inestable') == {'ok': 1}
+    assert servidor.peticiones['inestable'] == 3
+
+def test_no_reintenta_errores_4xx(servidor):
+    servidor.respuestas['no-existe'] = [(404, {}, {}, 0)]
+    cliente = crear_cliente(servidor)
+    assert cliente.obtener_json('no-existe') is None
+    assert servidor.peticiones['no-existe'] == 1
+
+def test_respeta_retry_after(servidor):
+    servidor.respuestas['limitado'] = [(429, {'Retry-After': '1'}, {}, 0), (200, {}, {'ok': 1}, 0)]
+    cliente = crear_cliente(servidor)
+    inicio = time.perf_counter()
+    assert cliente.obtener_json('limitado') == {'ok': 1}
+    assert time.perf_counter() - inicio >= 0.95
+    assert servidor.peticiones['limitado'] == 2
+
+def test_abandona_si_retry_after_supera_el_maximo(servidor):
+    servidor.respuestas['muy-limitado'] = [(429, {'Retry-After': '600'}, {}, 0)]
+    cliente = crear_cliente(servidor)
+    inicio = time.perf_counter()
+    assert cliente.obtener_json('muy-limitado') is None
+    assert time.perf_counter() - inicio < 1
+    assert servidor.peticiones['muy-limitado'] == 1
+
+def _en_paralelo(funcion, n):
+    resultados = [None] * n
+    def ejecutar(i):
+        resultados[i] = funcion()
+    hilos = [threading.Thread(target=ejecutar, args=(i,)) for i in range(n)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+def test_agrupa_peticiones_simultaneas(servidor):
+    servidor.respuestas['lento'] = [(200, {}, {'ok': 1}, 0.3)]
+    cliente = crear_cliente(servidor)
+    resultados = _en_paralelo(lambda: cliente.obtener_json('lento'), 5)
+    assert resultados == [{'ok': 1}] * 5
+    assert servidor.peticiones['lento'] == 1
+
+def test_hilos_agrupados_no_esperan_mas_del_limite(servidor):
+    servidor.respuestas['atascado'] = [(200, {}, {'ok': 1}, 1.0)]
+    cliente = crear_cliente(servidor, espera_agrupada=0.2)
+    propietario = threading.Thread(target=cliente.obtener_json, args=('atascado',))
+    propietario.start()
+    time.sleep(0.1)
+    inicio = time.perf_counter()
+    # El hilo agrupado se rinde al agotar su espera y devuelve None
+    assert cliente.obtener_json('atascado') is None
+    assert time.perf_counter() - inicio < 0.6
+    propietario.join()
+    assert servidor.peticiones['atascado'] == 1
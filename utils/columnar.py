@@ -0,0 +1,79 @@
+# utils/columnar.py
+import base64
+import numpy as np
+import pandas as pd
+
+# Máximo de decimales con los que se intenta guardar una columna float en float32
+MAX_DECIMALES = 6
+
+# Tipos enteros de menor a mayor tamaño para reducir las columnas enteras
+TIPOS_ENTEROS = ('<i1', '<i2', '<i4', '<i8')
+
+def _decimales(valores):
+    """Devuelve los decimales necesarios para representar la columna o None"""
+    for decimales in range(MAX_DECIMALES + 1):
+        if np.array_equal(np.round(valores, decimales), valores, equal_nan=True):
+            return decimales
+    return None
+
+def _codificar_columna(serie):
+    """Devuelve el array de una columna en formato de transporte"""
+    valores = serie.to_numpy()
+    tipo = serie.dtype
+
+    if tipo.kind == 'f':
+        valores = valores.astype('float64')
+        decimales = _decimales(valores)
+        # float32 si al redondear a sus decimales se recuperan los valores exactos
+        if decimales is not None:
+            valores32 = valores.astype('<f4')
+            if np.array_equal(np.round(valores32.astype('float64'), decimales), valores, equal_nan=True):
+                return {'dtype': '<f4', 'decimales': decimales, 'bdata': base64.b64encode(valores32.tobytes()).decode('ascii')}
+        return {'dtype': '<f8', 'bdata': base64.b64encode(valores.astype('<f8').tobytes()).decode('ascii')}
+
+    if tipo.kind in 'iu':
+        minimo, maximo = (int(valores.min()), int(valores.max())) if len(valores) else (0, 0)
+        for dtype in TIPOS_ENTEROS:
+            limites = np.iinfo(dtype)
+            if limites.min <= minimo and maximo <= limites.max:
+                return {'dtype': dtype, 'bdata': base64.b64encode(valores.astype(dtype).tobytes()).decode('ascii')}
+
+    if tipo.kind == 'b':
+        return {'dtype': '|b1', 'bdata': base64.b64encode(valores.astype('|b1').tobytes()).decode('ascii')}
+
+    # Texto y otros tipos: lista JSON (None en lugar de NaN)
+    return [None if pd.isna(valor) else valor for valor in valores.tolist()]
+
+def codificar_columnar(df):
+    """
+    Codifica un DataFrame en formato columnar para JSON:
+    {'columnas': [...], 'tipos': [...], 'arrays': [...]}. Las columnas
+    numéricas viajan como bytes en base64 (float32 cuando no se pierde
+    precisión, enteros con el tamaño mínimo); el resto como listas.
+    """
+    return {
+        'columnas': [str(columna) for columna in df.columns],
+        'tipos': [str(tipo) for tipo in df.dtypes],
+        'arrays': [_codificar_columna(df[columna]) for columna in df.columns]
+    }
+
+def _decodificar_columna(array, tipo):
+    if isinstance(array, list):
+        return pd.array(array, dtype=tipo) if tipo != 'object' else np.array(array, dtype=object)
+    valores = np.frombuffer(base64.b64decode(array['bdata']), dtype=array['dtype'])
+    if 'decimales' in array:
+        valores = np.round(valores.astype('float64'), array['decimales'])
+    return valores.astype(tipo)
+
+def decodificar_columnar(datos):
+    """Reconstruye el DataFrame a partir del formato de codificar_columnar"""
+    if not datos:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        columna: _decodificar_columna(array, tipo)
+        for columna, tipo, array in zip(datos['columnas'], datos['tipos'], datos['arrays'])
+    }, columns=datos['columnas'])
+
+def es_columnar(datos):
+    """Indica si un valor tiene el formato de codificar_columnar"""
+    return isinstance(datos, dict) and 'columnas' in datos and 'arrays' in datos
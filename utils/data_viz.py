@@ -1,7 +1,8 @@
-import plotly.express as px
 import plotly.graph_objects as go
-import pandas as pd
+from plotly.colors import sequential
+import numpy as np
 from config import CONFIG
+from utils.plantilla_graficos import PLANTILLA, plantilla_json
 
 def format_stat_name(stat_name):
     """
@@ -9,183 +10,189 @@ def format_stat_name(stat_name):
     """
     return ' '.join(word.capitalize() for word in stat_name.split('_'))
 
-def crear_grafico_linea(df, rango_jornadas, jugadores_seleccionados, metrica, colores_jugadores):
+# Construcción directa de figuras: dicts con arrays de NumPy, sin pasar por
+# plotly.express ni por la validación de go.Figure. Dash los serializa tal cual.
+
+def figura(trazas, **layout):
     """
-    Crea un gráfico de línea para la evolución de métricas por jornada
+    Devuelve una figura como dict con las trazas y el layout indicados
+    y la plantilla del equipo
     """
-    if not jugadores_seleccionados or not metrica:
-        return go.Figure()
+    layout.setdefault('template', plantilla_json())
+    return {'data': trazas, 'layout': layout}
+
+def traza_barras(x, y, **propiedades):
+    """Traza de barras como dict"""
+    return dict(type='bar', x=x, y=y, **propiedades)
+
+def traza_scatter(x, y, **propiedades):
+    """Traza scatter (puntos o líneas) como dict"""
+    return dict(type='scatter', x=x, y=y, **propiedades)
+
+def colores_secuencia(n):
+    """Devuelve n colores de la paleta de la plantilla, repitiéndola si hace falta"""
+    paleta = plantilla_json()['layout']['colorway']
+    return [paleta[i % len(paleta)] for i in range(n)]
+
+def escala_colores(colores):
+    """Convierte una lista de colores en una escala [[posición, color], ...]"""
+    return [[i / (len(colores) - 1), color] for i, color in enumerate(colores)]
 
-    # Filtrar por rango de jornadas
-    df_filtrado = df[(df['Jornada'] >= rango_jornadas[0]) & (df['Jornada'] <= rango_jornadas[1])]
+# Escala de color por jornada del scatter de datos condicionales
+ESCALA_JORNADAS = escala_colores(sequential.Blues)
 
-    # Filtrar por jugadores seleccionados
-    df_filtrado = df_filtrado[df_filtrado['Nombre'].isin(jugadores_seleccionados)]
+def referencia_tamano(tamanos, tamano_max):
+    """sizeref para marcadores de área, igual que px.scatter con size_max"""
+    maximo = np.nanmax(tamanos) if len(tamanos) else 0
+    return float(maximo) / tamano_max ** 2 if maximo > 0 else 1
 
-    # Agrupar por jornada y jugador, calculando la media de la métrica
-    df_agrupado = df_filtrado.groupby(['Jornada', 'Nombre'])[metrica].mean().reset_index()
+def traza_linea_jugador(jornadas, valores, jugador, color):
+    """Traza de la evolución de un jugador en el gráfico de línea"""
+    return traza_scatter(
+        jornadas,
+        valores,
+        mode='lines+markers',
+        name=jugador,
+        line=dict(color=color, width=3),
+        marker=dict(color=color, size=8)
+    )
+
+def parchear_trazas(parche, anteriores, nuevas, crear_traza):
+    """
+    Añade a un dash.Patch los cambios para pasar de las trazas 'anteriores'
+    a las 'nuevas' (listas de claves, una por traza): solo se envían las
+    trazas que cambian de posición o son nuevas y se borran las sobrantes.
+    crear_traza(i, clave) devuelve la traza de la posición i.
+    """
+    for i, clave in enumerate(nuevas):
+        if i >= len(anteriores):
+            parche['data'].append(crear_traza(i, clave))
+        elif anteriores[i] != clave:
+            parche['data'][i] = crear_traza(i, clave)
+    for i in range(len(anteriores) - 1, len(nuevas) - 1, -1):
+        del parche['data'][i]
+    return parche
+
+def crear_grafico_linea(cubo, rango_jornadas, jugadores_seleccionados, metrica, colores_jugadores):
+    """
+    Crea un gráfico de línea para la evolución de métricas por jornada
+    a partir del cubo jornada×jugador×métrica
+    """
+    if not jugadores_seleccionados or not metrica or not cubo.tiene_metrica(metrica):
+        return go.Figure()
 
     # Crear gráfico de línea con colores personalizados
     fig = go.Figure()
 
     for jugador in jugadores_seleccionados:
-        if jugador in df_agrupado['Nombre'].values:
-            df_jugador = df_agrupado[df_agrupado['Nombre'] == jugador]
+        serie = cubo.serie_jugador(jugador, metrica, rango_jornadas)
+        if serie is not None:
+            jornadas, valores = serie
             color = colores_jugadores.get(jugador, '#000000')  # Negro por defecto
-        
-            fig.add_trace(go.Scatter(
-                x=df_jugador['Jornada'],
-                y=df_jugador[metrica],
-                mode='lines+markers',
-                name=jugador,
-                line=dict(color=color, width=3),
-                marker=dict(color=color, size=8)
-            ))
+            fig.add_trace(traza_linea_jugador(jornadas, valores, jugador, color))
 
     # Personalizar gráfico
     fig.update_layout(
         title=f"{format_stat_name(metrica)} por Jornada",
         xaxis_title="Jornada",
         yaxis_title=format_stat_name(metrica),
-        template='plotly_white',
+        template=PLANTILLA,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        xaxis=dict(
-            tickmode='linear', 
-            dtick=1,
-            title_font=dict(color="#001F3F"),
-            tickfont=dict(color="#001F3F"),
-            gridcolor='rgba(0, 31, 63, 0.1)'
-        ),
-        yaxis=dict(
-            title_font=dict(color="#001F3F"),
-            tickfont=dict(color="#001F3F"),
-            gridcolor='rgba(0, 31, 63, 0.1)'
-        ),
-        plot_bgcolor='rgba(240,240,240,0.5)',
-        paper_bgcolor='#ffffff',
-        font=dict(family="Arial, sans-serif", size=12, color="#001F3F")
+        xaxis=dict(tickmode='linear', dtick=1)
     )
 
     return fig
 
-def crear_grafico_barras(df, jornada_seleccionada, metrica):
+def crear_grafico_barras(particion, jornada_seleccionada, metrica):
     """
     Crea un gráfico de barras para una jornada específica
     """
     if not jornada_seleccionada or not metrica:
         return go.Figure()
     
-    # Filtrar por jornada seleccionada
-    df_filtrado = df[df['Jornada'] == jornada_seleccionada]
+    # Filas de la jornada seleccionada
+    df_filtrado = particion.filas_jornada(jornada_seleccionada)
     
-    # Ordenar por valor de métrica descendente
-    df_filtrado = df_filtrado.sort_values(by=metrica, ascending=False)
-    
-    # Crear gráfico de barras
-    fig = px.bar(
-        df_filtrado, 
-        x='Nombre', 
-        y=metrica,
-        color='Nombre',
-        title=f"{format_stat_name(metrica)} - Jornada {jornada_seleccionada}",
-        labels={'Nombre': 'Jugador', metrica: format_stat_name(metrica)}
+    nombres = df_filtrado['Nombre'].to_numpy()
+    valores = df_filtrado[metrica].to_numpy(dtype='float64')
+
+    # Ordenar por valor de métrica descendente (los NaN al final)
+    orden = np.argsort(-valores, kind='stable')
+    etiqueta = format_stat_name(metrica)
+
+    # Una barra por jugador, cada una con un color de la paleta
+    barras = traza_barras(
+        nombres[orden],
+        valores[orden],
+        name='',
+        marker=dict(color=colores_secuencia(len(orden))),
+        hovertemplate=f"Jugador=%{{x}}<br>{etiqueta}=%{{y}}<extra></extra>"
     )
-    
-    # Personalizar gráfico
-    fig.update_layout(
-        template='plotly_white',
+
+    return figura(
+        [barras],
+        title=dict(text=f"{etiqueta} - Jornada {jornada_seleccionada}"),
         showlegend=False,
-        xaxis={
-            'categoryorder':'total descending',
-            'title_font': {'color': "#001F3F"},
-            'tickfont': {'color': "#001F3F"},
-            'gridcolor': 'rgba(0, 31, 63, 0.1)'
-        },
-        yaxis={
-            'title_font': {'color': "#001F3F"},
-            'tickfont': {'color': "#001F3F"},
-            'gridcolor': 'rgba(0, 31, 63, 0.1)'
-        },
-        plot_bgcolor='rgba(240,240,240,0.5)',
-        paper_bgcolor='#ffffff',
-        font=dict(family="Arial, sans-serif", size=12, color="#001F3F")
+        barmode='relative',
+        xaxis=dict(title=dict(text='Jugador'), categoryorder='total descending'),
+        yaxis=dict(title=dict(text=etiqueta))
     )
-    
-    return fig
 
-def crear_grafico_histograma(df, rango_jornadas, metrica):
+def crear_grafico_histograma(cubo, rango_jornadas, metrica):
     """
     Crea un gráfico de barras con línea de tendencia para un rango de jornadas
+    a partir de las medias del equipo precalculadas en el cubo
     """
-    if not metrica:
+    if not metrica or not cubo.tiene_metrica(metrica):
         return go.Figure()
 
-    # Filtrar por rango de jornadas
-    df_filtrado = df[(df['Jornada'] >= rango_jornadas[0]) & (df['Jornada'] <= rango_jornadas[1])]
-
-    # Calcular promedio de la métrica por jornada
-    df_agrupado = df_filtrado.groupby('Jornada')[metrica].mean().reset_index()
+    # Promedio de la métrica por jornada
+    jornadas, medias = cubo.serie_equipo(metrica, rango_jornadas)
+    etiqueta = format_stat_name(metrica)
 
-    # Crear gráfico de barras con línea
-    fig = px.bar(
-        df_agrupado, 
-        x='Jornada', 
-        y=metrica,
-        title=f"Evolución de {format_stat_name(metrica)} por Jornada",
-        labels={'Jornada': 'Jornada', metrica: format_stat_name(metrica)},
-        color_discrete_sequence=[CONFIG["team_colors"]["primary"]]
-    )
-
-    # Añadir línea de tendencia
-    fig.add_scatter(
-        x=df_agrupado['Jornada'], 
-        y=df_agrupado[metrica], 
-        mode='lines', 
-        name='Tendencia',
-        line=dict(color=CONFIG["team_colors"]["secondary"], width=3)
-    )
+    # Barras con la media y línea de tendencia
+    trazas = [
+        traza_barras(
+            jornadas,
+            medias,
+            name='',
+            showlegend=False,
+            marker=dict(color=CONFIG["team_colors"]["primary"]),
+            hovertemplate=f"Jornada=%{{x}}<br>{etiqueta}=%{{y}}<extra></extra>"
+        ),
+        traza_scatter(
+            jornadas,
+            medias,
+            mode='lines',
+            name='Tendencia',
+            line=dict(color=CONFIG["team_colors"]["secondary"], width=3)
+        )
+    ]
 
-    # Personalizar gráfico
-    fig.update_layout(
-        template='plotly_white',
+    return figura(
+        trazas,
+        title=dict(text=f"Evolución de {etiqueta} por Jornada"),
+        barmode='relative',
         bargap=0.3,
-        xaxis=dict(
-            tickmode='linear', 
-            dtick=1,
-            title_font=dict(color="#001F3F"),
-            tickfont=dict(color="#001F3F"),
-            gridcolor='rgba(0, 31, 63, 0.1)'
-        ),
-        yaxis=dict(
-            title_font=dict(color="#001F3F"),
-            tickfont=dict(color="#001F3F"),
-            gridcolor='rgba(0, 31, 63, 0.1)'
-        ),
-        plot_bgcolor='rgba(240,240,240,0.5)',
-        paper_bgcolor='#ffffff',
-        font=dict(family="Arial, sans-serif", size=12, color="#001F3F")
+        xaxis=dict(title=dict(text='Jornada'), tickmode='linear', dtick=1),
+        yaxis=dict(title=dict(text=etiqueta))
     )
 
-    return fig
-
-def crear_grafico_scatter(df, jornada_seleccionada, metrica_x, metrica_y, colores_por_posicion):
+def crear_grafico_scatter(particion, jornada_seleccionada, metrica_x, metrica_y, colores_por_posicion):
     """
     Crea un scatter plot para comparar dos métricas en una jornada específica
     """
     if not jornada_seleccionada or not metrica_x or not metrica_y:
         return go.Figure()
 
-    # Filtrar por jornada seleccionada
-    df_filtrado = df[df['Jornada'] == jornada_seleccionada]
+    # Filas de la jornada seleccionada
+    df_filtrado = particion.filas_jornada(jornada_seleccionada)
 
     # Crear scatter plot con colores por posición
     fig = go.Figure()
 
-    # Agrupar por posición para la leyenda
-    posiciones_unicas = df_filtrado['Posicion'].unique()
-
-    for posicion in posiciones_unicas:
-        df_pos = df_filtrado[df_filtrado['Posicion'] == posicion]
+    # Una traza por posición para la leyenda
+    for posicion, df_pos in particion.filas_por_posicion(jornada_seleccionada):
         color = colores_por_posicion.get(posicion, '#000000')  # Negro por defecto
     
         fig.add_trace(go.Scatter(
@@ -204,20 +211,7 @@ def crear_grafico_scatter(df, jornada_seleccionada, metrica_x, metrica_y, colore
         title=f"{format_stat_name(metrica_x)} vs {format_stat_name(metrica_y)} - Jornada {jornada_seleccionada}",
         xaxis_title=format_stat_name(metrica_x),
         yaxis_title=format_stat_name(metrica_y),
-        template='plotly_white',
-        xaxis=dict(
-            title_font=dict(color="#001F3F"),
-            tickfont=dict(color="#001F3F"),
-            gridcolor='rgba(0, 31, 63, 0.1)'
-        ),
-        yaxis=dict(
-            title_font=dict(color="#001F3F"),
-            tickfont=dict(color="#001F3F"),
-            gridcolor='rgba(0, 31, 63, 0.1)'
-        ),
-        plot_bgcolor='rgba(240,240,240,0.5)',
-        paper_bgcolor='#ffffff',
-        font=dict(family="Arial, sans-serif", size=12, color="#001F3F"),
+        template=PLANTILLA,
         margin=dict(l=80, r=80, t=100, b=80),
         height=450,
         legend=dict(
@@ -238,4 +232,66 @@ def crear_grafico_scatter(df, jornada_seleccionada, metrica_x, metrica_y, colore
     fig.update_xaxes(range=[x_min, x_max])
     fig.update_yaxes(range=[y_min, y_max])
 
-    return fig
\ No newline at end of file
+    return fig
+
+def crear_grafico_scatter_fisico(df, metrica_x, metrica_y, metrica_size):
+    """
+    Crea el scatter de datos condicionales de un jugador: una burbuja por
+    jornada (color por jornada, tamaño por metrica_size) y línea de tendencia
+    """
+    # Puntos: color por jornada y tamaño por la tercera métrica
+    jornadas = df['Jornada'].to_numpy()
+    tamanos = df[metrica_size].to_numpy(dtype='float64')
+    puntos = traza_scatter(
+        df[metrica_x].to_numpy(),
+        df[metrica_y].to_numpy(),
+        mode='markers',
+        name='',
+        showlegend=False,
+        hovertext=jornadas,
+        hovertemplate=(f"<b>%{{hovertext}}</b><br><br>{metrica_x}=%{{x}}<br>{metrica_y}=%{{y}}"
+                       f"<br>{metrica_size}=%{{marker.size}}<br>Jornada=%{{marker.color}}<extra></extra>"),
+        marker=dict(
+            color=jornadas,
+            coloraxis='coloraxis',
+            size=tamanos,
+            sizemode='area',
+            sizeref=referencia_tamano(tamanos, 30),
+            symbol='circle'
+        )
+    )
+    fig = figura(
+        [puntos],
+        xaxis=dict(title=dict(text=metrica_x.replace('_', ' ').title())),
+        yaxis=dict(title=dict(text=metrica_y.replace('_', ' ').title())),
+        coloraxis=dict(
+            colorbar=dict(title=dict(text="Jornada")),
+            colorscale=ESCALA_JORNADAS
+        ),
+        legend=dict(itemsizing='constant'),
+        margin=dict(l=40, r=40, t=60, b=40)
+    )
+
+    # Añadir líneas de tendencia (manejo de error mejorado)
+    try:
+        # Verificar si hay suficientes puntos para ajustar
+        if len(df) > 2 and len(df[metrica_x].unique()) > 1:
+            # Calcular línea de tendencia
+            z = np.polyfit(df[metrica_x], df[metrica_y], 1)
+            p = np.poly1d(z)
+            x_range = np.linspace(df[metrica_x].min(), df[metrica_x].max(), 100)
+
+            fig['data'].append(
+                traza_scatter(
+                    x_range,
+                    p(x_range),
+                    mode='lines',
+                    line=dict(color='rgba(0, 0, 0, 0.5)', dash='dash'),
+                    showlegend=False
+                )
+            )
+    except Exception as e:
+        print(f"Error en línea de tendencia: {e}")
+        # No añadir línea de tendencia si hay error
+
+    return fig
@@ -0,0 +1,83 @@
+# utils/figure_cache.py
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import plotly.io as pio
+from config import FIGURE_CACHE_CONFIG
+
+class CacheFiguras:
+    """
+    Caché LRU acotada de figuras de Plotly ya convertidas a dict con tipos
+    JSON (listas, números, texto). En cada acierto se devuelve ese mismo
+    dict, sin volver a validar, serializar ni parsear la figura: Dash solo
+    la serializa una vez al enviar la respuesta.
+    """
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._figuras = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {'hits': 0, 'misses': 0, 'expulsadas': 0}
+
+    def obtener(self, clave):
+        """Devuelve la figura guardada para la clave o None"""
+        with self._lock:
+            figura = self._figuras.get(clave)
+            if figura is None:
+                self._contadores['misses'] += 1
+                return None
+            self._figuras.move_to_end(clave)
+            self._contadores['hits'] += 1
+            return figura
+
+    def guardar(self, clave, figura):
+        """Guarda una figura (dict) y expulsa la menos usada si hace falta"""
+        with self._lock:
+            self._figuras[clave] = figura
+            self._figuras.move_to_end(clave)
+            while len(self._figuras) > self.max_entradas:
+                self._figuras.popitem(last=False)
+                self._contadores['expulsadas'] += 1
+
+    def vaciar(self):
+        with self._lock:
+            self._figuras.clear()
+
+    def estadisticas(self):
+        """Devuelve una copia de los contadores y el número de figuras guardadas"""
+        with self._lock:
+            return dict(self._contadores, entradas=len(self._figuras))
+
+def normalizar_entrada(valor):
+    """
+    Convierte una entrada de callback en un valor hashable y estable
+    (listas -> tuplas, escalares de NumPy -> Python)
+    """
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar_entrada(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, normalizar_entrada(v)) for k, v in valor.items()))
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+_cache = CacheFiguras(FIGURE_CACHE_CONFIG['max_entradas'])
+
+def figura_en_cache(nombre, entradas, version, generar):
+    """
+    Devuelve la figura (como dict listo para dcc.Graph) para el gráfico
+    'nombre' con las entradas dadas y la versión de los datos. Si no está en
+    la caché se llama a generar() y se guarda convertida a tipos JSON (una
+    sola vez, en el fallo). El dict devuelto es el de la caché, compartido
+    entre peticiones: no debe modificarse.
+    """
+    clave = (nombre, normalizar_entrada(version), normalizar_entrada(entradas))
+    figura = _cache.obtener(clave)
+    if figura is None:
+        figura = json.loads(pio.to_json(generar(), validate=False))
+        _cache.guardar(clave, figura)
+    return figura
+
+def estadisticas_cache_figuras():
+    """Devuelve los contadores de la caché de figuras"""
+    return _cache.estadisticas()
@@ -0,0 +1,79 @@
+# utils/formato_condicional.py
+import numpy as np
+from utils.tabla_fisica import valores_redondeados
+
+# Cuantiles que delimitan las bandas alta y baja de cada columna
+CUANTIL_BAJO = 0.25
+CUANTIL_ALTO = 0.75
+
+# Estilos de cada banda (máximo, alta, baja y mínimo)
+ESTILOS_BANDAS = {
+    'maximo': {'backgroundColor': 'rgba(76, 175, 80, 0.8)', 'fontWeight': 'bold', 'color': 'white'},
+    'alto': {'backgroundColor': 'rgba(76, 175, 80, 0.4)', 'color': 'white'},
+    'bajo': {'backgroundColor': 'rgba(244, 67, 54, 0.4)', 'color': 'white'},
+    'minimo': {'backgroundColor': 'rgba(244, 67, 54, 0.8)', 'fontWeight': 'bold', 'color': 'white'}
+}
+
+def calcular_bandas(valores):
+    """
+    Calcula de una vez, para cada columna de una matriz (filas x columnas),
+    el mínimo, los cuantiles bajo/alto y el máximo ignorando los nulos.
+    Devuelve una matriz 4 x columnas (NaN en las columnas sin valores).
+    """
+    valores = np.asarray(valores, dtype='float64')
+    cuantiles = [0, CUANTIL_BAJO, CUANTIL_ALTO, 1]
+    nulos = np.isnan(valores)
+    # Sin nulos basta np.quantile, bastante más rápido que np.nanquantile
+    if not nulos.any():
+        return np.quantile(valores, cuantiles, axis=0)
+    bandas = np.full((4, valores.shape[1]), np.nan)
+    con_datos = ~nulos.all(axis=0)
+    if con_datos.any():
+        bandas[:, con_datos] = np.nanquantile(valores[:, con_datos], cuantiles, axis=0)
+    return bandas
+
+def _numero(valor):
+    """Literal numérico para filter_query (enteros sin decimales)"""
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+def reglas_columna(columna, minimo, bajo, alto, maximo):
+    """
+    Reglas de style_data_conditional de una columna a partir de sus bandas.
+    Son como mucho cuatro por columna, independientemente del número de filas,
+    y comparan números (la tabla recibe los valores numéricos).
+    """
+    c = f'{{{columna}}}'
+    reglas = []
+    # Bandas estrictamente separadas del mínimo, del máximo y entre sí (los
+    # cuantiles pueden coincidir con ellos); si no, quedarían solapadas.
+    # Si bajo == alto, los valores en ese cuantil van a la banda alta.
+    banda_alta = minimo < alto < maximo
+    if minimo < bajo and (bajo < alto or not banda_alta):
+        reglas.append((f'{c} <= {_numero(bajo)} && {c} > {_numero(minimo)}', 'bajo'))
+    if banda_alta:
+        reglas.append((f'{c} >= {_numero(alto)} && {c} < {_numero(maximo)}', 'alto'))
+    # Mínimo y máximo al final: DataTable aplica la última regla que coincide
+    if minimo != maximo:
+        reglas.append((f'{c} <= {_numero(minimo)}', 'minimo'))
+    reglas.append((f'{c} >= {_numero(maximo)}', 'maximo'))
+    return [{'if': {'column_id': columna, 'filter_query': consulta}, **ESTILOS_BANDAS[banda]}
+            for consulta, banda in reglas]
+
+def reglas_formato_condicional(df, metricas):
+    """
+    Devuelve las reglas de resaltado (máximo, mínimo y bandas por cuantiles)
+    de las métricas numéricas de la tabla. Las bandas de todas las columnas
+    se calculan en una sola operación sobre los mismos valores redondeados
+    que muestra la tabla, de modo que las igualdades con el máximo y el
+    mínimo son exactas.
+    """
+    numericas = [metrica for metrica in dict.fromkeys(metricas)
+                 if metrica in df.columns and df[metrica].dtype.kind in 'fiu']
+    if not numericas or df.empty:
+        return []
+    bandas = calcular_bandas(valores_redondeados(df[numericas]))
+    reglas = []
+    for metrica, (minimo, bajo, alto, maximo) in zip(numericas, bandas.T.tolist()):
+        if not np.isnan(maximo):
+            reglas.extend(reglas_columna(metrica, minimo, bajo, alto, maximo))
+    return reglas
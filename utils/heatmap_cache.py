@@ -0,0 +1,122 @@
+# utils/heatmap_cache.py
+import os
+import json
+import time
+import hashlib
+import threading
+from config import HEATMAP_CONFIG
+
+# Formatos de imagen que se guardan en la caché
+EXTENSIONES = ('.png', '.webp')
+
+# Contadores de uso de la caché (por proceso)
+_contadores = {'hits': 0, 'misses': 0, 'expirados': 0, 'expulsados': 0}
+_lock = threading.Lock()
+
+def _incrementar(contador, cantidad=1):
+    with _lock:
+        _contadores[contador] += cantidad
+
+def clave_heatmap(id_sofascore, torneo, temporada, parametros=None):
+    """
+    Genera la clave de contenido de un heatmap a partir del jugador, el
+    torneo, la temporada y los parámetros de renderizado
+    """
+    contenido = json.dumps({
+        'id': str(id_sofascore),
+        'torneo': str(torneo),
+        'temporada': str(temporada),
+        'parametros': parametros or {}
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+def _ruta(clave, formato='png'):
+    return os.path.join(HEATMAP_CONFIG['cache_dir'], f"{clave}.{formato}")
+
+def leer_cache(clave, ignorar_ttl=False, formato='png'):
+    """
+    Devuelve los bytes de la imagen guardada para la clave o None si no
+    existen o han caducado. Cada acierto actualiza la fecha de acceso (para el LRU).
+    """
+    ruta = _ruta(clave, formato)
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        _incrementar('misses')
+        return None
+
+    ahora = time.time()
+    if not ignorar_ttl and ahora - estado.st_mtime > HEATMAP_CONFIG['cache_ttl']:
+        _incrementar('expirados')
+        _incrementar('misses')
+        return None
+
+    try:
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        # atime = último acceso (LRU), mtime = fecha de escritura (TTL)
+        os.utime(ruta, (ahora, estado.st_mtime))
+    except FileNotFoundError:
+        _incrementar('misses')
+        return None
+
+    _incrementar('hits')
+    return contenido
+
+def guardar_cache(clave, contenido, formato='png'):
+    """
+    Guarda los bytes de la imagen de forma atómica y expulsa las entradas
+    menos usadas si la caché supera el tamaño máximo
+    """
+    directorio = HEATMAP_CONFIG['cache_dir']
+    os.makedirs(directorio, exist_ok=True)
+
+    ruta = _ruta(clave, formato)
+    ruta_tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(ruta_tmp, 'wb') as f:
+        f.write(contenido)
+    os.replace(ruta_tmp, ruta)
+
+    expulsar_entradas()
+
+def expulsar_entradas(max_bytes=None):
+    """
+    Elimina las imágenes con acceso más antiguo hasta que la caché no
+    supere el tamaño máximo. Devuelve el número de ficheros eliminados.
+    """
+    max_bytes = HEATMAP_CONFIG['cache_max_bytes'] if max_bytes is None else max_bytes
+    directorio = HEATMAP_CONFIG['cache_dir']
+    if not os.path.isdir(directorio):
+        return 0
+
+    entradas = []
+    total = 0
+    for entrada in os.scandir(directorio):
+        if not entrada.name.endswith(EXTENSIONES):
+            continue
+        try:
+            estado = entrada.stat()
+        except FileNotFoundError:
+            continue
+        entradas.append((estado.st_atime, estado.st_size, entrada.path))
+        total += estado.st_size
+
+    eliminados = 0
+    for _, tamano, ruta in sorted(entradas):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(ruta)
+            total -= tamano
+            eliminados += 1
+        except FileNotFoundError:
+            continue
+
+    if eliminados:
+        _incrementar('expulsados', eliminados)
+    return eliminados
+
+def estadisticas_cache():
+    """Devuelve una copia de los contadores de la caché"""
+    with _lock:
+        return dict(_contadores)
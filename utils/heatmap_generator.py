@@ -1,78 +1,98 @@
-import requests
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
+from matplotlib.figure import Figure
 import matplotlib
 matplotlib.use('Agg')  # Para usar matplotlib sin GUI
 import io
-import base64
-import time
-import random
+import threading
+import hashlib
+from PIL import Image, ImageDraw, ImageFont
+from config import HEATMAP_CONFIG
+from utils.heatmap_cache import clave_heatmap, leer_cache, guardar_cache
+from utils.sofascore_client import obtener_cliente
+from utils.render_pool import renderizar_en_pool
 
-def obtener_datos_heatmap(id_sofascore):
+# Parámetros de renderizado que forman parte de la clave de la caché
+PARAMETROS_RENDER = {
+    'figsize': (10, 6),
+    'dpi': 100,
+    'gridsize': 40,
+    'cmap': 'Blues'
+}
+
+# Dimensiones del campo (metros) y zona visible alrededor
+LARGO_CAMPO = 105
+ANCHO_CAMPO = 68
+EXTENSION_CAMPO = (-5, LARGO_CAMPO + 5, -5, ANCHO_CAMPO + 5)
+
+# Lienzos reutilizables por hilo: (figsize, dpi) -> {'fig', 'ax', 'cbar', 'hb'}
+_lienzos = threading.local()
+
+# Motores de renderizado disponibles (HEATMAP_CONFIG['motor'])
+MOTORES = ('matplotlib', 'pillow')
+
+# Colores del campo y tamaño de la imagen en el motor Pillow
+COLOR_CESPED = (0x4C, 0xAF, 0x50)
+COLOR_LINEAS = (0, 0, 139)  # darkblue
+PIXELES_POR_METRO = 6
+ANCHO_BARRA_COLOR = 18
+
+# Capas del campo y tabla de colores ya calculadas del motor Pillow
+_fondos_pillow = {}
+_lock_fondos = threading.Lock()
+
+def obtener_datos_heatmap(id_sofascore, torneo=None, temporada=None):
     """
     Obtiene los datos del heatmap de un jugador desde la API de Sofascore
     """
-    # URL de la API
-    api_url = f"https://www.sofascore.com/api/v1/player/{id_sofascore}/unique-tournament/8/season/61643/heatmap/overall"
-    
-    # Configurar headers para simular un navegador normal
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'application/json',
-        'Referer': 'https://www.sofascore.com/'
-    }
-    
+    torneo = torneo or HEATMAP_CONFIG['torneo']
+    temporada = temporada or HEATMAP_CONFIG['temporada']
+
     try:
-        # Añadir un pequeño retraso
-        time.sleep(0.5)
-
-        # Realizar la solicitud HTTP a la API
-        response = requests.get(api_url, headers=headers)
-        
-        # Verificar si la solicitud fue exitosa
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error al obtener heatmap, código: {response.status_code}")
-            return None
+        return obtener_cliente().obtener_heatmap(id_sofascore, torneo, temporada)
     except Exception as e:
         print(f"Error al obtener heatmap: {e}")
         return None
 
+def _figura_a_png(fig):
+    """
+    Guarda la figura en PNG, la cierra y devuelve los bytes
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=PARAMETROS_RENDER['dpi'], bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
+
 def generar_mensaje_heatmap(mensaje):
     """
-    Genera una imagen con un mensaje de error o información
+    Genera una imagen PNG (bytes) con un mensaje de error o información
     """
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = plt.subplots(figsize=PARAMETROS_RENDER['figsize'])
     ax.text(0.5, 0.5, mensaje, 
             horizontalalignment='center', verticalalignment='center', 
             transform=ax.transAxes, fontsize=14)
     ax.axis('off')
     
-    # Guardar en buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-    buf.seek(0)
-    plt.close(fig)
-    
-    # Codificar en base64
-    encoded = base64.b64encode(buf.read()).decode('utf-8')
-    return encoded
+    return _figura_a_png(fig)
 
-def generar_heatmap_simulado(id_sofascore):
+# Estados de _obtener_heatmap cuya imagen es un render real y vigente: son
+# los únicos que el navegador puede cachear. Los de respaldo (caducado,
+# simulado, sobrecarga) y los mensajes de error (invalido) se sirven sin caché
+ESTADOS_CACHEABLES = ('en_cache', 'generado')
+
+# Aviso que se sirve cuando el pool rechaza el render y no hay imagen en la
+# caché: se dibuja una sola vez al importar el módulo
+IMAGEN_SOBRECARGA = generar_mensaje_heatmap("Heatmap no disponible temporalmente")
+
+def _dibujar_campo(ax):
     """
-    Genera un heatmap simulado cuando no se pueden obtener datos de la API
+    Dibuja el césped y las líneas del campo en unos ejes
     """
-    # Crear figura
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Dimensiones del campo
-    field_length = 105
-    field_width = 68
+    field_length = LARGO_CAMPO
+    field_width = ANCHO_CAMPO
     
-    # Dibujar campo de fútbol
     # Fondo verde
     rect = Rectangle((0, 0), field_length, field_width, 
                     facecolor='#4CAF50',
@@ -107,9 +127,254 @@ def generar_heatmap_simulado(id_sofascore):
     ax.plot([field_length, field_length - 16.5], [field_width/2 - 20.15, field_width/2 - 20.15], color=line_color, linewidth=line_width)
     ax.plot([field_length - 16.5, field_length - 16.5], [field_width/2 - 20.15, field_width/2 + 20.15], color=line_color, linewidth=line_width)
     ax.plot([field_length, field_length - 16.5], [field_width/2 + 20.15, field_width/2 + 20.15], color=line_color, linewidth=line_width)
+
+def _obtener_lienzo():
+    """
+    Devuelve el lienzo del hilo actual con el campo ya dibujado. La figura,
+    los ejes, las líneas del campo y la barra de color se crean una sola vez
+    por tamaño y DPI; en cada heatmap solo se sustituye la capa de densidad.
+    """
+    lienzos = getattr(_lienzos, 'por_tamano', None)
+    if lienzos is None:
+        lienzos = _lienzos.por_tamano = {}
+
+    clave = (tuple(PARAMETROS_RENDER['figsize']), PARAMETROS_RENDER['dpi'])
+    lienzo = lienzos.get(clave)
+    if lienzo is None:
+        # Figura fuera de pyplot para que no se cierre ni se comparta entre hilos
+        fig = Figure(figsize=PARAMETROS_RENDER['figsize'])
+        ax = fig.add_subplot()
+        _dibujar_campo(ax)
+
+        # Configuración de ejes
+        ax.set_aspect('equal')
+        ax.set_xlim(EXTENSION_CAMPO[0], EXTENSION_CAMPO[1])
+        ax.set_ylim(EXTENSION_CAMPO[2], EXTENSION_CAMPO[3])
+        ax.axis('off')
+
+        lienzo = lienzos[clave] = {'fig': fig, 'ax': ax, 'cbar': None, 'hb': None}
+    return lienzo
+
+def _parametros_render():
+    """Parámetros que identifican la imagen generada (incluye el motor)"""
+    return dict(PARAMETROS_RENDER, motor=HEATMAP_CONFIG['motor'])
+
+def _dibujar_heatmap(x, y, pesos=None, motor=None):
+    """
+    Dibuja la capa de densidad sobre el campo con el motor configurado y
+    devuelve el PNG en bytes
+    """
+    motor = motor or HEATMAP_CONFIG['motor']
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de heatmap desconocido: {motor}")
+    if motor == 'pillow':
+        return _dibujar_heatmap_pillow(x, y, pesos)
+    return _dibujar_heatmap_matplotlib(x, y, pesos)
+
+def _dibujar_heatmap_matplotlib(x, y, pesos=None):
+    """
+    Dibuja la capa de densidad (hexbin) sobre el campo ya dibujado y devuelve
+    el PNG en bytes
+    """
+    lienzo = _obtener_lienzo()
+    fig, ax = lienzo['fig'], lienzo['ax']
+    if lienzo['hb'] is not None:
+        lienzo['hb'].remove()
+    
+    # Crear heatmap usando hexbin (ponderado por 'pesos' si se indican)
+    hb = ax.hexbin(
+        x, 
+        y,
+        C=pesos,
+        reduce_C_function=np.sum,
+        gridsize=PARAMETROS_RENDER['gridsize'],
+        cmap=PARAMETROS_RENDER['cmap'],
+        alpha=0.8,
+        mincnt=1,
+        extent=[0, LARGO_CAMPO, 0, ANCHO_CAMPO]
+    )
+    lienzo['hb'] = hb
+    
+    # Colorbar (se crea con el primer heatmap y después solo se actualiza)
+    if lienzo['cbar'] is None:
+        lienzo['cbar'] = fig.colorbar(hb, ax=ax)
+        lienzo['cbar'].set_label('Densidad', fontsize=8, color="darkblue", weight="bold")
+    else:
+        lienzo['cbar'].update_normal(hb)
+    
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=PARAMETROS_RENDER['dpi'], bbox_inches='tight')
+    return buf.getvalue()
+
+def _a_pixeles(x, y):
+    """Convierte coordenadas del campo (metros) a píxeles de la imagen"""
+    x0, _, _, y1 = EXTENSION_CAMPO
+    return (x - x0) * PIXELES_POR_METRO, (y1 - y) * PIXELES_POR_METRO
+
+def _dibujar_campo_pillow(cesped, lineas):
+    """
+    Dibuja el césped y las líneas del campo en dos imágenes RGBA
+    """
+    field_length = LARGO_CAMPO
+    field_width = ANCHO_CAMPO
+    line_width = max(1, round(1.5 * PARAMETROS_RENDER['dpi'] / 72))
+
+    # Fondo verde (semitransparente sobre blanco, como en matplotlib)
+    draw_cesped = ImageDraw.Draw(cesped)
+    draw_cesped.rectangle(
+        [_a_pixeles(0, field_width), _a_pixeles(field_length, 0)],
+        fill=COLOR_CESPED + (204,))
+
+    # Círculo central (en matplotlib queda por debajo de la densidad)
+    draw_cesped.ellipse([_a_pixeles(field_length/2 - 9.15, field_width/2 + 9.15),
+                         _a_pixeles(field_length/2 + 9.15, field_width/2 - 9.15)],
+                        outline=COLOR_LINEAS + (255,), width=line_width)
+
+    draw = ImageDraw.Draw(lineas)
+    def linea(xs, ys):
+        draw.line([_a_pixeles(xi, yi) for xi, yi in zip(xs, ys)],
+                  fill=COLOR_LINEAS, width=line_width, joint='curve')
+
+    # Líneas exteriores y línea de medio campo
+    linea([0, 0, field_length, field_length, 0], [0, field_width, field_width, 0, 0])
+    linea([field_length/2, field_length/2], [0, field_width])
+
+    # Áreas grandes
+    linea([0, 16.5, 16.5, 0], [field_width/2 - 20.15, field_width/2 - 20.15,
+                               field_width/2 + 20.15, field_width/2 + 20.15])
+    linea([field_length, field_length - 16.5, field_length - 16.5, field_length],
+          [field_width/2 - 20.15, field_width/2 - 20.15, field_width/2 + 20.15, field_width/2 + 20.15])
+
+def _obtener_fondo_pillow():
+    """
+    Devuelve (césped, líneas, tabla de colores) del motor Pillow. Se calculan
+    una sola vez y se reutilizan en todos los heatmaps.
+    """
+    fondo = _fondos_pillow.get(PARAMETROS_RENDER['cmap'])
+    if fondo is not None:
+        return fondo
+
+    with _lock_fondos:
+        fondo = _fondos_pillow.get(PARAMETROS_RENDER['cmap'])
+        if fondo is None:
+            x0, x1, y0, y1 = EXTENSION_CAMPO
+            tamano = (round((x1 - x0) * PIXELES_POR_METRO), round((y1 - y0) * PIXELES_POR_METRO))
+            cesped = Image.new('RGBA', tamano, (255, 255, 255, 255))
+            lineas = Image.new('RGBA', tamano, (0, 0, 0, 0))
+            capa_cesped = Image.new('RGBA', tamano, (0, 0, 0, 0))
+            _dibujar_campo_pillow(capa_cesped, lineas)
+            cesped.alpha_composite(capa_cesped)
+
+            # Tabla de 256 colores RGBA del colormap (sin crear figuras)
+            lut = matplotlib.colormaps[PARAMETROS_RENDER['cmap']](np.linspace(0, 1, 256), bytes=True)
+            fondo = (cesped, lineas, lut)
+            _fondos_pillow[PARAMETROS_RENDER['cmap']] = fondo
+        return fondo
+
+def _agrupar_hexagonos(x, y, pesos=None):
+    """
+    Agrupa los puntos en la rejilla hexagonal de hexbin (misma geometría que
+    matplotlib) con NumPy. Devuelve los centros y el valor de cada hexágono
+    con al menos un punto.
+    """
+    nx = PARAMETROS_RENDER['gridsize']
+    ny = int(nx / np.sqrt(3))
+    sx = LARGO_CAMPO / nx
+    sy = ANCHO_CAMPO / ny
+    pesos = np.ones(len(x)) if pesos is None else np.asarray(pesos, dtype=float)
+
+    ix = np.asarray(x, dtype=float) / sx
+    iy = np.asarray(y, dtype=float) / sy
+    ix1, iy1 = np.round(ix).astype(int), np.round(iy).astype(int)
+    ix2, iy2 = np.floor(ix).astype(int), np.floor(iy).astype(int)
+
+    # Cada punto va al centro más cercano de las dos rejillas desplazadas
+    d1 = (ix - ix1) ** 2 + 3.0 * (iy - iy1) ** 2
+    d2 = (ix - ix2 - 0.5) ** 2 + 3.0 * (iy - iy2 - 0.5) ** 2
+    en_rejilla1 = d1 < d2
+
+    centros_x, centros_y, valores = [], [], []
+    for mascara, jx, jy, ancho, alto, desplazamiento in (
+            (en_rejilla1, ix1, iy1, nx + 1, ny + 1, 0.0),
+            (~en_rejilla1, ix2, iy2, nx, ny, 0.5)):
+        validos = mascara & (jx >= 0) & (jx < ancho) & (jy >= 0) & (jy < alto)
+        celdas = jx[validos] * alto + jy[validos]
+        suma = np.bincount(celdas, weights=pesos[validos], minlength=ancho * alto)
+        ocupadas = np.flatnonzero(np.bincount(celdas, minlength=ancho * alto))
+        centros_x.append((ocupadas // alto + desplazamiento) * sx)
+        centros_y.append((ocupadas % alto + desplazamiento) * sy)
+        valores.append(suma[ocupadas])
+
+    return np.concatenate(centros_x), np.concatenate(centros_y), np.concatenate(valores), sx, sy
+
+def _dibujar_barra_color(lienzo, izquierda, arriba, alto, vmin, vmax, lut):
+    """Dibuja la barra de color con sus marcas y la etiqueta 'Densidad'"""
+    # Misma transparencia (0.8 sobre blanco) que los hexágonos
+    colores = (lut[::-1, :3] * 0.8 + 255 * 0.2).astype(np.uint8)
+    gradiente = Image.fromarray(colores.reshape(256, 1, 3)).resize(
+        (ANCHO_BARRA_COLOR, alto), Image.BILINEAR)
+    lienzo.paste(gradiente, (izquierda, arriba))
+    draw = ImageDraw.Draw(lienzo)
+    draw.rectangle([izquierda, arriba, izquierda + ANCHO_BARRA_COLOR, arriba + alto], outline=(0, 0, 0))
+
+    fuente = ImageFont.load_default()
+    for valor in np.linspace(vmin, vmax, 5):
+        y = arriba + alto - (valor - vmin) / ((vmax - vmin) or 1) * alto
+        draw.line([izquierda + ANCHO_BARRA_COLOR, y, izquierda + ANCHO_BARRA_COLOR + 4, y], fill=(0, 0, 0))
+        draw.text((izquierda + ANCHO_BARRA_COLOR + 7, y), f"{valor:g}", fill=(0, 0, 0), font=fuente, anchor='lm')
+
+    etiqueta = Image.new('RGBA', (80, 14), (0, 0, 0, 0))
+    ImageDraw.Draw(etiqueta).text((40, 7), 'Densidad', fill=COLOR_LINEAS, font=fuente, anchor='mm')
+    etiqueta = etiqueta.rotate(90, expand=True)
+    lienzo.paste(etiqueta, (izquierda + ANCHO_BARRA_COLOR + 40, arriba + alto // 2 - 40), etiqueta)
+
+def _dibujar_heatmap_pillow(x, y, pesos=None):
+    """
+    Motor sin matplotlib: agrupa los puntos en hexágonos con NumPy, colorea
+    con la tabla del colormap y escribe el PNG directamente con Pillow
+    """
+    cesped, lineas, lut = _obtener_fondo_pillow()
+    centros_x, centros_y, valores, sx, sy = _agrupar_hexagonos(x, y, pesos)
+
+    imagen = cesped.copy()
+    if valores.size:
+        # Normalización lineal entre el mínimo y el máximo (como hexbin)
+        vmin, vmax = valores.min(), valores.max()
+        indices = np.clip(((valores - vmin) / ((vmax - vmin) or 1) * 255).round(), 0, 255).astype(int)
+
+        # Hexágono de hexbin (vértices relativos al centro)
+        hexagono = np.array([[.5, -.5], [.5, .5], [0., 1.], [-.5, .5], [-.5, -.5], [0., -1.]]) * [sx, sy / 3]
+        capa = Image.new('RGBA', imagen.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(capa)
+        for cx, cy, indice in zip(centros_x, centros_y, indices):
+            px, py = _a_pixeles(cx + hexagono[:, 0], cy + hexagono[:, 1])
+            draw.polygon(list(zip(px, py)), fill=tuple(lut[indice, :3]) + (204,))
+        imagen.alpha_composite(capa)
+    else:
+        vmin, vmax = 0, 1
+    imagen.alpha_composite(lineas)
+
+    # Lienzo final con la barra de color a la derecha
+    margen = 10
+    lienzo = Image.new('RGB', (imagen.width + 2 * margen + ANCHO_BARRA_COLOR + 70, imagen.height + 2 * margen), 'white')
+    lienzo.paste(imagen, (margen, margen), imagen)
+    _dibujar_barra_color(lienzo, imagen.width + 2 * margen, margen, imagen.height,
+                         float(vmin), float(vmax), lut)
+
+    buf = io.BytesIO()
+    lienzo.save(buf, format='PNG')
+    return buf.getvalue()
+
+def generar_heatmap_simulado(id_sofascore):
+    """
+    Genera un heatmap simulado (PNG en bytes) cuando no se pueden obtener datos de la API
+    """
+    field_length = LARGO_CAMPO
+    field_width = ANCHO_CAMPO
     
-    # Generar datos aleatorios basados en el ID del jugador para que sea consistente
-    random.seed(int(id_sofascore) % 1000)
+    # Generador aleatorio propio sembrado con el ID del jugador, para que la
+    # simulación sea siempre la misma (no depende del estado global de NumPy)
+    rng = np.random.default_rng(int(id_sofascore))
     
     # Simular posiciones según la posición típica (depende del rango del ID)
     if int(id_sofascore) % 4 == 0:  # Porteros
@@ -135,121 +400,210 @@ def generar_heatmap_simulado(id_sofascore):
     
     # Generar puntos aleatorios con distribución normal
     num_points = 200
-    x = np.random.normal(x_center, x_range/3, num_points)
-    y = np.random.normal(y_center, y_range/3, num_points)
+    x = rng.normal(x_center, x_range/3, num_points)
+    y = rng.normal(y_center, y_range/3, num_points)
     
     # Limitar a las dimensiones del campo
     x = np.clip(x, 0, field_length)
     y = np.clip(y, 0, field_width)
     
-    # Crear heatmap usando hexbin
-    hb = ax.hexbin(
-        x, 
-        y,
-        gridsize=40,
-        cmap='Blues',
-        alpha=0.8,
-        mincnt=1,
-        extent=[0, field_length, 0, field_width]
-    )
-    
-    # Colorbar
-    cbar = plt.colorbar(hb, ax=ax)
-    cbar.set_label('Densidad', fontsize=8, color="darkblue", weight="bold")
-    
-    # Configuración de ejes
-    ax.set_aspect('equal')
-    ax.set_xlim(-5, field_length + 5)
-    ax.set_ylim(-5, field_width + 5)
-    ax.axis('off')
-    
-    # Guardar en buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-    buf.seek(0)
-    plt.close(fig)
-    
-    # Codificar en base64
-    encoded = base64.b64encode(buf.read()).decode('utf-8')
-    return encoded
+    return _dibujar_heatmap(x, y)
+
+def _clave_jugador(id_sofascore, torneo=None, temporada=None):
+    """Clave de caché del heatmap de un jugador con los parámetros actuales"""
+    torneo = torneo or HEATMAP_CONFIG['torneo']
+    temporada = temporada or HEATMAP_CONFIG['temporada']
+    return clave_heatmap(id_sofascore, torneo, temporada, _parametros_render())
+
+def _renderizar(funcion, *args, al_completar=None):
+    """
+    Dibuja en el pool de procesos si está activado. Devuelve None si el pool
+    está saturado o el render no termina a tiempo.
+    """
+    if not HEATMAP_CONFIG['render_en_pool']:
+        return funcion(*args)
+    return renderizar_en_pool(funcion, *args, al_completar=al_completar)
+
+def _clave_simulado(id_sofascore):
+    """Clave de caché del heatmap simulado de un jugador"""
+    return clave_heatmap(id_sofascore, 'simulado', 'simulado', _parametros_render())
+
+def _heatmap_simulado(id_sofascore, solo_cache=False):
+    """
+    Devuelve el heatmap simulado de un jugador. Es determinista, así que se
+    guarda en la caché con su propia clave (nunca con la del heatmap real).
+    Devuelve None si no está en la caché y no se puede dibujar (solo_cache o
+    pool saturado): nunca se dibuja en el hilo de la petición si el pool
+    ha rechazado el trabajo.
+    """
+    clave = _clave_simulado(id_sofascore)
+    contenido = leer_cache(clave)
+    if contenido is not None or solo_cache:
+        return contenido
+
+    contenido = _renderizar(generar_heatmap_simulado, id_sofascore,
+                            al_completar=lambda png: guardar_cache(clave, png))
+    if contenido is not None:
+        guardar_cache(clave, contenido)
+    return contenido
 
-def generar_heatmap(id_sofascore):
+def _obtener_heatmap(id_sofascore, torneo=None, temporada=None, forzar=False):
     """
-    Genera una imagen de heatmap para un jugador basado en su ID de Sofascore
+    Devuelve (PNG en bytes, clave de caché, estado). La clave es None cuando
+    la imagen no debe cachearse (mensajes de error o imágenes degradadas),
+    para que se vuelva a intentar en la siguiente petición; el heatmap
+    simulado devuelve su propia clave (es determinista). Estados: 'en_cache',
+    'generado', 'caducado' (imagen antigua de la caché por sobrecarga),
+    'simulado', 'sobrecarga' (imagen fija de aviso) o 'invalido'. Con
+    forzar=True se ignora la imagen guardada y se vuelve a descargar y dibujar.
     """
     # Verificar que se ha recibido un ID válido
     if not id_sofascore:
         print("ID de Sofascore no proporcionado")
         # Retornar imagen de "No disponible"
-        return generar_mensaje_heatmap("ID de Sofascore no disponible")
+        return generar_mensaje_heatmap("ID de Sofascore no disponible"), None, 'invalido'
     
     try:
         # Convertir a entero para asegurarnos que es un ID válido
         id_sofascore = int(id_sofascore)
     except:
         print(f"ID de Sofascore inválido: {id_sofascore}")
-        return generar_mensaje_heatmap("ID de Sofascore inválido")
+        return generar_mensaje_heatmap("ID de Sofascore inválido"), None, 'invalido'
+
+    torneo = torneo or HEATMAP_CONFIG['torneo']
+    temporada = temporada or HEATMAP_CONFIG['temporada']
+    clave = _clave_jugador(id_sofascore, torneo, temporada)
+
+    contenido = None if forzar else leer_cache(clave)
+    if contenido is not None:
+        return contenido, clave, 'en_cache'
     
     # Obtener datos
-    data = obtener_datos_heatmap(id_sofascore)
+    data = obtener_datos_heatmap(id_sofascore, torneo, temporada)
     
     if not data or 'points' not in data or len(data.get('points', [])) == 0:
         print(f"No hay datos disponibles para el ID: {id_sofascore}, generando simulación")
         # Usar heatmap simulado cuando no hay datos
-        return generar_heatmap_simulado(id_sofascore)
-    
-    # Procesar los datos de puntos
-    points = data['points']
-    x = [p['x'] for p in points]
-    y = [p['y'] for p in points]
-    counts = [p.get('count', 1) for p in points]
+        contenido = _heatmap_simulado(id_sofascore)
+        if contenido is None:
+            return IMAGEN_SOBRECARGA, None, 'sobrecarga'
+        return contenido, _clave_simulado(id_sofascore), 'simulado'
+
+    # Si el render llega tras el timeout se guarda igualmente en la caché
+    contenido = _renderizar(renderizar_heatmap, data['points'], HEATMAP_CONFIG['motor'],
+                            al_completar=lambda png: guardar_cache(clave, png))
+    if contenido is not None:
+        guardar_cache(clave, contenido)
+        return contenido, clave, 'generado'
+
+    # Pool saturado o render lento: solo imágenes ya hechas (caducada de la
+    # caché, simulada de la caché o el aviso fijo), sin dibujar en este hilo
+    print(f"Render del heatmap {id_sofascore} no disponible, usando imagen de respaldo")
+    contenido = leer_cache(clave, ignorar_ttl=True)
+    if contenido is not None:
+        return contenido, None, 'caducado'
+    contenido = _heatmap_simulado(id_sofascore, solo_cache=True)
+    if contenido is not None:
+        return contenido, _clave_simulado(id_sofascore), 'simulado'
+    return IMAGEN_SOBRECARGA, None, 'sobrecarga'
+
+def obtener_heatmap(id_sofascore, torneo=None, temporada=None, miniatura=False):
+    """
+    Devuelve (imagen en bytes, estado) del heatmap de un jugador: PNG o, con
+    miniatura=True, WebP reducido. El estado es el de _obtener_heatmap y
+    permite a quien sirve la imagen decidir si el navegador puede cachearla.
+    """
+    contenido, clave, estado = _obtener_heatmap(id_sofascore, torneo, temporada)
+    if miniatura:
+        contenido = _miniatura(contenido, clave)
+    return contenido, estado
+
+def generar_heatmap_png(id_sofascore, torneo=None, temporada=None):
+    """
+    Devuelve el heatmap de un jugador en PNG (bytes), usando la caché de disco
+    """
+    return obtener_heatmap(id_sofascore, torneo, temporada)[0]
+
+def generar_heatmap_miniatura(id_sofascore, torneo=None, temporada=None):
+    """
+    Devuelve una versión reducida del heatmap en WebP (bytes), pensada para
+    la página de datos físicos y los informes. Se cachea junto al PNG.
+    """
+    return obtener_heatmap(id_sofascore, torneo, temporada, miniatura=True)[0]
+
+def _miniatura(contenido, clave):
+    """Reduce un PNG a WebP, usando la caché si el PNG tiene clave"""
+    clave_miniatura = None
+    if clave is not None:
+        # La clave depende del PNG original para no servir miniaturas antiguas
+        clave_miniatura = clave_heatmap(hashlib.sha256(contenido).hexdigest(), 'miniatura',
+                                        HEATMAP_CONFIG['miniatura_ancho'],
+                                        {'calidad': HEATMAP_CONFIG['miniatura_calidad']})
+        miniatura = leer_cache(clave_miniatura, formato='webp')
+        if miniatura is not None:
+            return miniatura
+
+    imagen = Image.open(io.BytesIO(contenido))
+    ancho = min(HEATMAP_CONFIG['miniatura_ancho'], imagen.width)
+    alto = max(1, round(imagen.height * ancho / imagen.width))
+    buf = io.BytesIO()
+    imagen.resize((ancho, alto), Image.LANCZOS).save(
+        buf, format='WEBP', quality=HEATMAP_CONFIG['miniatura_calidad'])
+    miniatura = buf.getvalue()
+
+    if clave_miniatura is not None:
+        guardar_cache(clave_miniatura, miniatura, formato='webp')
+    return miniatura
+
+def puntos_a_arrays(points):
+    """
+    Convierte los puntos de la API en arrays x, y, conteos (descarta los
+    puntos con conteo 0, que no aportan densidad)
+    """
+    x = np.fromiter((p['x'] for p in points), dtype=float, count=len(points))
+    y = np.fromiter((p['y'] for p in points), dtype=float, count=len(points))
+    counts = np.fromiter((p.get('count', 1) for p in points), dtype=float, count=len(points))
+    validos = counts > 0
+    return x[validos], y[validos], counts[validos]
+
+def precalentar_heatmap(id_sofascore, torneo=None, temporada=None, forzar=False, miniatura=True):
+    """
+    Deja en la caché el heatmap de un jugador (y su miniatura). Devuelve el
+    estado: 'en_cache', 'generado', 'caducado' (render no disponible),
+    'simulado' (sin datos, no se cachea), 'sobrecarga' (render no disponible
+    y sin imagen de respaldo) o 'invalido' (ID no válido).
+    """
+    try:
+        id_sofascore = int(id_sofascore)
+    except (TypeError, ValueError):
+        return 'invalido'
+
+    if not forzar and leer_cache(_clave_jugador(id_sofascore, torneo, temporada)) is not None:
+        estado = 'en_cache'
+    else:
+        _, _, estado = _obtener_heatmap(id_sofascore, torneo, temporada, forzar=True)
+
+    if miniatura and estado in ('en_cache', 'generado'):
+        generar_heatmap_miniatura(id_sofascore, torneo, temporada)
+    return estado
+
+def renderizar_heatmap(points, motor=None):
+    """
+    Dibuja el heatmap a partir de los puntos de la API y devuelve el PNG en
+    bytes (con el motor indicado o el de HEATMAP_CONFIG['motor'])
+    """
+    # Procesar los datos de puntos como arrays (un elemento por punto distinto)
+    x, y, counts = puntos_a_arrays(points)
+    if x.size == 0:
+        return generar_mensaje_heatmap("Sin datos de posiciones")
     
     # Determinar dimensiones del campo
-    field_length = 105
-    field_width = 68
+    field_length = LARGO_CAMPO
+    field_width = ANCHO_CAMPO
     
     # Análisis de rangos para normalización
-    x_min, x_max = min(x), max(x)
-    y_min, y_max = min(y), max(y)
-    
-    # Crear figura
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Dibujar campo de fútbol
-    # Fondo verde
-    rect = Rectangle((0, 0), field_length, field_width, 
-                    facecolor='#4CAF50',  # Verde césped
-                    alpha=0.8,            # Semitransparente
-                    edgecolor=None)
-    ax.add_patch(rect)
-    
-    # Líneas del campo
-    line_color = 'darkblue'
-    line_width = 1.5
-    
-    # Líneas exteriores
-    ax.plot([0, 0, field_length, field_length, 0], 
-             [0, field_width, field_width, 0, 0], 
-             color=line_color, linewidth=line_width)
-    
-    # Línea de medio campo
-    ax.plot([field_length/2, field_length/2], [0, field_width], color=line_color, linewidth=line_width)
-    
-    # Círculo central
-    center_circle = plt.Circle((field_length/2, field_width/2), 9.15, fill=False, 
-                              color=line_color, linewidth=line_width)
-    ax.add_artist(center_circle)
-    
-    # Áreas
-    # Área grande izquierda
-    ax.plot([0, 16.5], [field_width/2 - 20.15, field_width/2 - 20.15], color=line_color, linewidth=line_width)
-    ax.plot([16.5, 16.5], [field_width/2 - 20.15, field_width/2 + 20.15], color=line_color, linewidth=line_width)
-    ax.plot([0, 16.5], [field_width/2 + 20.15, field_width/2 + 20.15], color=line_color, linewidth=line_width)
-    
-    # Área grande derecha
-    ax.plot([field_length, field_length - 16.5], [field_width/2 - 20.15, field_width/2 - 20.15], color=line_color, linewidth=line_width)
-    ax.plot([field_length - 16.5, field_length - 16.5], [field_width/2 - 20.15, field_width/2 + 20.15], color=line_color, linewidth=line_width)
-    ax.plot([field_length, field_length - 16.5], [field_width/2 + 20.15, field_width/2 + 20.15], color=line_color, linewidth=line_width)
+    x_min, x_max = x.min(), x.max()
+    y_min, y_max = y.min(), y.max()
     
     # Transformación de coordenadas
     # Centro del campo original y destino
@@ -263,51 +617,11 @@ def generar_heatmap(id_sofascore):
     scale_x = field_length / (x_max - x_min) * expansion_factor if x_max > x_min else 1
     scale_y = field_width / (y_max - y_min) * expansion_factor if y_max > y_min else 1
     
-    # Transformar coordenadas
-    x_transformed = [(xi - x_center_orig) * scale_x + x_center_target for xi in x]
-    y_transformed = [(yi - y_center_orig) * scale_y + y_center_target for yi in y]
-    
-    # Limitar coordenadas al campo
+    # Transformar coordenadas y limitarlas al campo
     margin = 2
-    x_transformed = [max(0-margin, min(xi, field_length+margin)) for xi in x_transformed]
-    y_transformed = [max(0-margin, min(yi, field_width+margin)) for yi in y_transformed]
-    
-    # Crear puntos ponderados basados en el conteo
-    x_weighted = []
-    y_weighted = []
-    
-    for i in range(len(x_transformed)):
-        # Repetir cada punto según su conteo
-        x_weighted.extend([x_transformed[i]] * counts[i])
-        y_weighted.extend([y_transformed[i]] * counts[i])
-    
-    # Crear heatmap usando hexbin
-    hb = ax.hexbin(
-        x_weighted, 
-        y_weighted,
-        gridsize=40,
-        cmap='Blues',
-        alpha=0.8,
-        mincnt=1,
-        extent=[0, field_length, 0, field_width]
-    )
-    
-    # Colorbar
-    cbar = plt.colorbar(hb, ax=ax)
-    cbar.set_label('Densidad', fontsize=8, color="darkblue", weight="bold")
-    
-    # Configuración de ejes
-    ax.set_aspect('equal')
-    ax.set_xlim(-5, field_length + 5)
-    ax.set_ylim(-5, field_width + 5)
-    ax.axis('off')
-       
-    # Guardar en buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-    buf.seek(0)
-    plt.close(fig)
+    x_transformed = np.clip((x - x_center_orig) * scale_x + x_center_target, -margin, field_length + margin)
+    y_transformed = np.clip((y - y_center_orig) * scale_y + y_center_target, -margin, field_width + margin)
     
-    # Codificar en base64
-    encoded = base64.b64encode(buf.read()).decode('utf-8')
-    return encoded
\ No newline at end of file
+    # Heatmap ponderado por el conteo de cada punto
+    # (equivale a repetir cada punto 'count' veces)
+    return _dibujar_heatmap(x_transformed, y_transformed, counts, motor)
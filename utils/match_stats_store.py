@@ -0,0 +1,187 @@
+# utils/match_stats_store.py
+import os
+import threading
+import numpy as np
+import pandas as pd
+from config import DATA_CONFIG
+
+# Tipos de las columnas clave del CSV de estadísticas por jornada
+TIPOS_COLUMNAS = {
+    'Nombre': 'category',
+    'Posicion': 'category',
+    'Partido': 'category'
+}
+
+# Almacén compartido por proceso: ruta -> {'mtime': ..., 'df': ..., 'cubo': ..., 'particion': ...}
+_almacen = {}
+_lock = threading.Lock()
+
+def cargar_estadisticas_partido(file_path):
+    """
+    Lee el CSV de estadísticas por jornada con tipos compactos
+    """
+    try:
+        df = pd.read_csv(file_path, dtype=TIPOS_COLUMNAS)
+    except FileNotFoundError:
+        raise Exception(f"El archivo '{file_path}' no fue encontrado.")
+    except pd.errors.EmptyDataError:
+        raise Exception('El archivo de datos está vacío.')
+    except pd.errors.ParserError:
+        raise Exception('Error al analizar el archivo de datos.')
+
+    df['Jornada'] = df['Jornada'].astype('int64')
+    return df
+
+def obtener_estadisticas_partido(file_path=None):
+    """
+    Devuelve el DataFrame compartido de estadísticas por jornada.
+    Se carga una vez por proceso y solo se vuelve a leer si cambia
+    la fecha de modificación del fichero. No debe modificarse in situ.
+    """
+    ruta = file_path or DATA_CONFIG['match_stats_path']
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except FileNotFoundError:
+        raise Exception(f"El archivo '{ruta}' no fue encontrado.")
+
+    with _lock:
+        entrada = _almacen.get(ruta)
+        if entrada is None or entrada['mtime'] != mtime:
+            entrada = {'mtime': mtime, 'df': cargar_estadisticas_partido(ruta)}
+            _almacen[ruta] = entrada
+        return entrada['df']
+
+
+def obtener_version_estadisticas(file_path=None):
+    """
+    Devuelve una marca de versión de los datos cargados (ruta y fecha de
+    modificación). Cambia cada vez que se recarga el CSV, por lo que sirve
+    para invalidar cachés derivadas.
+    """
+    ruta = file_path or DATA_CONFIG['match_stats_path']
+    obtener_estadisticas_partido(ruta)
+    with _lock:
+        return (ruta, _almacen[ruta]['mtime'])
+
+class CuboEstadisticas:
+    """
+    Agregado denso de las estadísticas por jornada: valores[jornada, jugador,
+    métrica] con la media de cada jugador en cada jornada (NaN si no jugó) y
+    medias_equipo[jornada, métrica] con la media de todas las filas de la
+    jornada. Los gráficos de evolución cortan estos arrays en lugar de filtrar
+    y agrupar el DataFrame en cada callback.
+    """
+    def __init__(self, df):
+        self.metricas = [columna for columna in df.select_dtypes('number').columns if columna != 'Jornada']
+        self.jornadas = np.sort(df['Jornada'].unique())
+        self.jugadores = list(df['Nombre'].cat.categories)
+        self._indice_jugador = {jugador: i for i, jugador in enumerate(self.jugadores)}
+        self._indice_metrica = {metrica: i for i, metrica in enumerate(self.metricas)}
+
+        # Media por jornada y jugador
+        agrupado = df.groupby(['Jornada', 'Nombre'], observed=True)[self.metricas].mean()
+        filas = np.searchsorted(self.jornadas, agrupado.index.get_level_values('Jornada'))
+        columnas = agrupado.index.get_level_values('Nombre').map(self._indice_jugador).to_numpy()
+        self.valores = np.full((len(self.jornadas), len(self.jugadores), len(self.metricas)), np.nan)
+        self.valores[filas, columnas] = agrupado.to_numpy(dtype='float64')
+        # Distingue "no jugó" de "jugó pero sin dato"
+        self.presente = np.zeros((len(self.jornadas), len(self.jugadores)), dtype=bool)
+        self.presente[filas, columnas] = True
+
+        # Media del equipo por jornada
+        self.medias_equipo = df.groupby('Jornada')[self.metricas].mean().to_numpy(dtype='float64')
+
+    def tiene_metrica(self, metrica):
+        return metrica in self._indice_metrica
+
+    def _rango(self, rango_jornadas):
+        """Devuelve el slice de jornadas comprendidas en el rango (ambos incluidos)"""
+        inicio = np.searchsorted(self.jornadas, rango_jornadas[0], side='left')
+        fin = np.searchsorted(self.jornadas, rango_jornadas[1], side='right')
+        return slice(inicio, fin)
+
+    def serie_jugador(self, jugador, metrica, rango_jornadas):
+        """
+        Devuelve (jornadas, valores) de un jugador en el rango, solo con las
+        jornadas en las que aparece. None si no aparece en ninguna.
+        """
+        i = self._indice_jugador.get(jugador)
+        if i is None:
+            return None
+        tramo = self._rango(rango_jornadas)
+        presente = self.presente[tramo, i]
+        if not presente.any():
+            return None
+        valores = self.valores[tramo, i, self._indice_metrica[metrica]]
+        return self.jornadas[tramo][presente], valores[presente]
+
+    def serie_equipo(self, metrica, rango_jornadas):
+        """Devuelve (jornadas, medias) del equipo en el rango"""
+        tramo = self._rango(rango_jornadas)
+        return self.jornadas[tramo], self.medias_equipo[tramo, self._indice_metrica[metrica]]
+
+
+def obtener_cubo_estadisticas(file_path=None):
+    """
+    Devuelve el cubo jornada×jugador×métrica de los datos cargados. Se
+    construye la primera vez que se pide y se descarta junto con el
+    DataFrame cuando cambia el fichero.
+    """
+    ruta = file_path or DATA_CONFIG['match_stats_path']
+    obtener_estadisticas_partido(ruta)
+    with _lock:
+        entrada = _almacen[ruta]
+        if 'cubo' not in entrada:
+            entrada['cubo'] = CuboEstadisticas(entrada['df'])
+        return entrada['cubo']
+
+
+class ParticionJornadas:
+    """
+    Índice de las filas de cada jornada sobre una copia de los datos ordenada
+    por jornada: jornada -> slice de filas y (jornada, posición) -> posiciones
+    de fila. Los gráficos de una sola jornada solo recorren sus filas.
+    Dentro de cada jornada se conserva el orden original del CSV.
+    """
+    def __init__(self, df):
+        orden = np.argsort(df['Jornada'].to_numpy(), kind='stable')
+        self.df = df.iloc[orden]
+        jornadas, inicios, cuentas = np.unique(self.df['Jornada'].to_numpy(),
+                                               return_index=True, return_counts=True)
+        codigos = self.df['Posicion'].cat.codes.to_numpy()
+        categorias = self.df['Posicion'].cat.categories
+
+        self._jornadas = {}
+        self._posiciones = {}
+        for jornada, inicio, cuenta in zip(jornadas.tolist(), inicios.tolist(), cuentas.tolist()):
+            tramo = slice(inicio, inicio + cuenta)
+            self._jornadas[jornada] = tramo
+            # Posiciones en orden de aparición, como Series.unique()
+            codigos_jornada = codigos[tramo]
+            self._posiciones[jornada] = [
+                (categorias[codigo], np.flatnonzero(codigos_jornada == codigo) + inicio)
+                for codigo in pd.unique(codigos_jornada) if codigo >= 0
+            ]
+
+    def filas_jornada(self, jornada):
+        """Devuelve las filas de la jornada (vacío si no existe)"""
+        return self.df.iloc[self._jornadas.get(jornada, slice(0, 0))]
+
+    def filas_por_posicion(self, jornada):
+        """Devuelve [(posición, filas)] de la jornada en orden de aparición"""
+        return [(posicion, self.df.iloc[filas]) for posicion, filas in self._posiciones.get(jornada, [])]
+
+
+def obtener_particion_jornadas(file_path=None):
+    """
+    Devuelve el índice por jornada de los datos cargados. Se construye la
+    primera vez que se pide y se descarta junto con el DataFrame cuando
+    cambia el fichero.
+    """
+    ruta = file_path or DATA_CONFIG['match_stats_path']
+    obtener_estadisticas_partido(ruta)
+    with _lock:
+        entrada = _almacen[ruta]
+        if 'particion' not in entrada:
+            entrada['particion'] = ParticionJornadas(entrada['df'])
+        return entrada['particion']
@@ -0,0 +1,57 @@
+# utils/migrar_bd.py
+"""
+Migración única de la BD de datos condicionales: activa el modo WAL y crea
+los índices de datos_fisicos. La aplicación solo abre la BD en modo lectura,
+así que este paso se ejecuta aparte al desplegar (sobre la copia que use el
+servidor, no sobre el fichero versionado del repositorio).
+
+Uso (desde la raíz del proyecto):
+    python -m utils.migrar_bd [--db ruta/a/la/bd.db]
+"""
+import os
+import sqlite3
+import argparse
+from config import DB_CONFIG
+
+# Índices que convierten las consultas por jugador/jornada en búsquedas indexadas
+INDICES = {
+    'idx_datos_fisicos_nombre_jornada': 'datos_fisicos (Nombre, Jornada)',
+    'idx_datos_fisicos_jornada': 'datos_fisicos (Jornada)'
+}
+
+def migrar_bd(db_path=None):
+    """
+    Activa el modo WAL y crea los índices si no existen. Devuelve la lista
+    de índices creados.
+    """
+    ruta = db_path or DB_CONFIG['condic_db_path']
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"No se encontró la base de datos en: {ruta}")
+
+    conn = sqlite3.connect(ruta)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        tablas = [fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        existentes = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        creados = []
+        if 'datos_fisicos' in tablas:
+            for nombre, definicion in INDICES.items():
+                if nombre not in existentes:
+                    conn.execute(f"CREATE INDEX {nombre} ON {definicion}")
+                    creados.append(nombre)
+        conn.commit()
+        return creados
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Activa WAL y crea los índices de la BD de datos condicionales")
+    parser.add_argument('--db', default=None,
+                        help="Ruta de la BD (por defecto DB_CONFIG['condic_db_path'])")
+    args = parser.parse_args()
+
+    creados = migrar_bd(args.db)
+    print(f"Modo WAL activado; índices creados: {', '.join(creados) if creados else 'ninguno (ya existían)'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# utils/physical_db.py
+import os
+import sqlite3
+import threading
+from urllib.request import pathname2url
+import pandas as pd
+from config import DB_CONFIG
+
+# Consultas preparadas (sqlite3 reutiliza el statement compilado por conexión)
+SQL_DATOS_FISICOS = """
+SELECT * FROM datos_fisicos
+WHERE Nombre = ?
+ORDER BY Jornada
+"""
+
+SQL_INFO_BASICA = """
+SELECT Nombre as nombre, Posicion as posicion, Edad as edad
+FROM datos_fisicos
+WHERE Nombre = ?
+LIMIT 1
+"""
+
+SQL_NOMBRES_JUGADORES = "SELECT DISTINCT Nombre FROM datos_fisicos ORDER BY Nombre"
+
+SQL_TABLAS = "SELECT name FROM sqlite_master WHERE type='table'"
+
+SQL_METRICAS = """
+SELECT name FROM pragma_table_info('datos_fisicos')
+WHERE name NOT IN ('id', 'Jornada', 'Nombre', 'Posicion', 'Min', 'Edad')
+"""
+
+_local = threading.local()
+
+def _ruta_bd(db_path=None):
+    return db_path or DB_CONFIG['condic_db_path']
+
+def obtener_conexion(db_path=None):
+    """
+    Devuelve la conexión de solo lectura del hilo actual (una por hilo y BD).
+    La BD no se modifica: el modo WAL y los índices se aplican aparte con
+    python -m utils.migrar_bd
+    """
+    ruta = _ruta_bd(db_path)
+    conexiones = getattr(_local, 'conexiones', None)
+    if conexiones is None:
+        conexiones = _local.conexiones = {}
+
+    conn = conexiones.get(ruta)
+    if conn is None:
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f"No se encontró la base de datos en: {ruta}")
+        conn = sqlite3.connect(f"file:{pathname2url(ruta)}?mode=ro", uri=True)
+        conexiones[ruta] = conn
+    return conn
+
+def firma_bd(db_path=None):
+    """
+    Devuelve una firma barata del estado de la BD (mtime del fichero y del WAL)
+    """
+    ruta = _ruta_bd(db_path)
+    firma = []
+    for fichero in (ruta, ruta + '-wal'):
+        try:
+            estado = os.stat(fichero)
+            firma.append((estado.st_mtime_ns, estado.st_size))
+        except FileNotFoundError:
+            firma.append(None)
+    return tuple(firma)
+
+def cerrar_conexiones():
+    """
+    Cierra las conexiones abiertas por el hilo actual
+    """
+    conexiones = getattr(_local, 'conexiones', None) or {}
+    for conn in conexiones.values():
+        conn.close()
+    conexiones.clear()
+
+def existe_tabla_datos_fisicos(db_path=None):
+    """Comprueba si la tabla datos_fisicos existe en la BD"""
+    conn = obtener_conexion(db_path)
+    return 'datos_fisicos' in [fila[0] for fila in conn.execute(SQL_TABLAS)]
+
+def obtener_datos_fisicos(nombre_jugador, db_path=None):
+    """Devuelve los datos físicos de un jugador ordenados por jornada"""
+    return pd.read_sql(SQL_DATOS_FISICOS, obtener_conexion(db_path), params=[nombre_jugador])
+
+def obtener_info_basica(nombre_jugador, db_path=None):
+    """Devuelve nombre, posición y edad del jugador o None si no existe"""
+    conn = obtener_conexion(db_path)
+    fila = conn.execute(SQL_INFO_BASICA, (nombre_jugador,)).fetchone()
+    if fila is None:
+        return None
+    return {'nombre': fila[0], 'posicion': fila[1], 'edad': fila[2]}
+
+def obtener_nombres_jugadores(db_path=None):
+    """Devuelve la lista ordenada de jugadores con datos físicos"""
+    conn = obtener_conexion(db_path)
+    return [fila[0] for fila in conn.execute(SQL_NOMBRES_JUGADORES)]
+
+def obtener_metricas_fisicas(db_path=None):
+    """Devuelve las columnas de métricas de la tabla datos_fisicos"""
+    conn = obtener_conexion(db_path)
+    return [fila[0] for fila in conn.execute(SQL_METRICAS)]
@@ -0,0 +1,329 @@
+# utils/physical_summary.py
+import os
+import sqlite3
+import threading
+import hashlib
+import numpy as np
+import pandas as pd
+from config import DB_CONFIG
+from utils.physical_db import obtener_conexion, firma_bd
+
+# Tablas materializadas con los resúmenes de datos_fisicos. Se guardan en una
+# BD de caché aparte (DB_CONFIG['resumen_dir']), nunca en la BD de origen
+TABLA_JUGADOR = 'resumen_fisico_jugador'
+TABLA_EQUIPO = 'resumen_fisico_equipo'
+TABLA_POSICION = 'resumen_fisico_posicion'
+
+# Columnas de datos_fisicos que no son métricas agregables
+COLUMNAS_NO_METRICAS = ['id', 'Jornada', 'Nombre', 'Posicion']
+
+# Columnas fijas del resumen por jugador (antes de los agregados por métrica).
+# Huella: resumen del contenido de las jornadas del jugador para detectar
+# correcciones de valores que no cambian el nº de jornadas ni la última
+COLUMNAS_BASE_JUGADOR = ['Temporada', 'Nombre', 'Posicion', 'Jornadas', 'Ultima_Jornada', 'Huella']
+
+# Agregados por jugador y percentiles de equipo que se materializan
+AGREGADOS_JUGADOR = ['avg', 'max', 'min']
+PERCENTILES_EQUIPO = [10, 25, 50, 75, 90]
+
+# Referencia por posición: media, mediana y p90 de cada métrica.
+# POSICION_TODAS agrupa a toda la plantilla (posición desconocida o sin datos)
+AGREGADOS_POSICION = ['Media', 'Mediana', 'P90']
+POSICION_TODAS = 'TODAS'
+
+# Caché en memoria por BD: ruta -> {'firma', 'jugadores', 'equipo', 'posiciones'}
+_cache = {}
+_lock = threading.Lock()
+
+def _temporada():
+    return DB_CONFIG['temporada']
+
+def ruta_resumenes(db_path=None):
+    """
+    Ruta de la BD de caché con los resúmenes de una BD de origen: una por
+    fichero de origen (hash de su ruta). El contenido se valida con la
+    huella de cada jugador, así que una copia distinta nunca reutiliza
+    resúmenes de otra.
+    """
+    origen = os.path.abspath(db_path or DB_CONFIG['condic_db_path'])
+    nombre = hashlib.sha1(origen.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(DB_CONFIG['resumen_dir'], f"resumen_fisico_{nombre}.db")
+
+def _abrir_resumenes(db_path=None):
+    """Abre la BD de caché de resúmenes (quien la abre debe cerrarla)"""
+    os.makedirs(DB_CONFIG['resumen_dir'], exist_ok=True)
+    return sqlite3.connect(ruta_resumenes(db_path))
+
+def _metricas_numericas(conn):
+    """Columnas numéricas de datos_fisicos (INTEGER/REAL) que se agregan"""
+    filas = conn.execute("SELECT name, type FROM pragma_table_info('datos_fisicos')").fetchall()
+    return [nombre for nombre, tipo in filas
+            if nombre not in COLUMNAS_NO_METRICAS and tipo.upper() in ('INTEGER', 'REAL')]
+
+def _columnas_jugador(metricas):
+    return [f"{agregado}_{metrica}" for metrica in metricas for agregado in AGREGADOS_JUGADOR]
+
+def _crear_tablas(conn, metricas):
+    """
+    Crea las tablas de resumen. Si el esquema de datos_fisicos ha cambiado,
+    se reconstruyen desde cero.
+    """
+    esperadas = COLUMNAS_BASE_JUGADOR + _columnas_jugador(metricas)
+    actuales = [fila[1] for fila in conn.execute(f"PRAGMA table_info({TABLA_JUGADOR})")]
+    if actuales and actuales != esperadas:
+        conn.execute(f"DROP TABLE {TABLA_JUGADOR}")
+        actuales = []
+
+    if not actuales:
+        columnas_sql = ', '.join(f'"{columna}" REAL' for columna in _columnas_jugador(metricas))
+        conn.execute(f"""
+        CREATE TABLE {TABLA_JUGADOR} (
+            Temporada TEXT NOT NULL,
+            Nombre TEXT NOT NULL,
+            Posicion TEXT,
+            Jornadas INTEGER NOT NULL,
+            Ultima_Jornada INTEGER NOT NULL,
+            Huella TEXT,
+            {columnas_sql},
+            PRIMARY KEY (Temporada, Nombre)
+        )
+        """)
+
+    columnas_percentiles = ', '.join(f"P{p} REAL" for p in PERCENTILES_EQUIPO)
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {TABLA_EQUIPO} (
+        Temporada TEXT NOT NULL,
+        Metrica TEXT NOT NULL,
+        Media REAL,
+        {columnas_percentiles},
+        PRIMARY KEY (Temporada, Metrica)
+    )
+    """)
+
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {TABLA_POSICION} (
+        Temporada TEXT NOT NULL,
+        Posicion TEXT NOT NULL,
+        Metrica TEXT NOT NULL,
+        Media REAL,
+        Mediana REAL,
+        P90 REAL,
+        PRIMARY KEY (Temporada, Posicion, Metrica)
+    )
+    """)
+
+def _huellas_jugadores(conn, metricas):
+    """
+    Calcula en SQL, por jugador, (nº de jornadas, última jornada, huella).
+    La huella combina las sumas de id, de cada métrica y de cada métrica por
+    jornada, y las posiciones por jornada: cualquier corrección de un valor
+    la cambia aunque no cambien las jornadas.
+    """
+    sumas = ', '.join(f'TOTAL("{metrica}"), TOTAL("{metrica}" * Jornada)' for metrica in metricas)
+    consulta = f"""
+    SELECT Nombre, COUNT(*), MAX(Jornada), GROUP_CONCAT(Jornada || ':' || IFNULL(Posicion, ''), ','),
+           TOTAL(id){', ' + sumas if sumas else ''}
+    FROM datos_fisicos GROUP BY Nombre
+    """
+    huellas = {}
+    for nombre, n, ultima, posiciones, *totales in conn.execute(consulta):
+        contenido = repr((sorted((posiciones or '').split(',')), totales))
+        huellas[nombre] = (n, ultima, hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:16])
+    return huellas
+
+def _jugadores_modificados(origen, destino, temporada, metricas):
+    """
+    Compara (nº de jornadas, última jornada, huella) de cada jugador de la BD
+    de origen con el resumen guardado en la de caché. Devuelve (jugadores a
+    recalcular, jugadores a eliminar, huellas actuales).
+    """
+    actuales = _huellas_jugadores(origen, metricas)
+    guardados = {nombre: (n, ultima, huella) for nombre, n, ultima, huella in destino.execute(
+        f"SELECT Nombre, Jornadas, Ultima_Jornada, Huella FROM {TABLA_JUGADOR} WHERE Temporada = ?", (temporada,))}
+
+    modificados = [nombre for nombre, firma in actuales.items() if guardados.get(nombre) != firma]
+    eliminados = [nombre for nombre in guardados if nombre not in actuales]
+    return modificados, eliminados, actuales
+
+def _resumir_jugadores(df, metricas, temporada, huellas):
+    """Calcula las filas de resumen por jugador a partir de sus jornadas"""
+    grupos = df.groupby('Nombre', sort=False)
+    agregados = grupos[metricas].agg(['mean', 'max', 'min'])
+    posiciones = grupos['Posicion'].agg(lambda serie: serie.mode().iloc[0] if not serie.mode().empty else None)
+    jornadas = grupos['Jornada'].agg(['count', 'max'])
+
+    filas = []
+    for nombre in agregados.index:
+        valores = []
+        for metrica in metricas:
+            for agregado, columna in zip(AGREGADOS_JUGADOR, ['mean', 'max', 'min']):
+                valor = agregados.at[nombre, (metrica, columna)]
+                valores.append(None if pd.isna(valor) else float(valor))
+        filas.append([temporada, nombre, posiciones[nombre],
+                      int(jornadas.at[nombre, 'count']), int(jornadas.at[nombre, 'max']),
+                      huellas[nombre][2]] + valores)
+    return filas
+
+def _resumir_equipo(df, metricas, temporada):
+    """Calcula media y percentiles de toda la plantilla para cada métrica"""
+    valores = df[metricas].to_numpy(dtype=float)
+    medias = np.nanmean(valores, axis=0)
+    percentiles = np.nanpercentile(valores, PERCENTILES_EQUIPO, axis=0)
+
+    filas = []
+    for i, metrica in enumerate(metricas):
+        filas.append([temporada, metrica, float(medias[i])] + [float(p) for p in percentiles[:, i]])
+    return filas
+
+def _resumir_posiciones(df, metricas, temporada):
+    """
+    Calcula media, mediana y p90 de cada métrica por Posicion (cada jornada
+    cuenta con la posición en la que se jugó) y para toda la plantilla
+    """
+    grupos = [(POSICION_TODAS, df)] + [(posicion, grupo) for posicion, grupo in df.groupby('Posicion') if posicion]
+
+    filas = []
+    for posicion, grupo in grupos:
+        valores = grupo[metricas].to_numpy(dtype=float)
+        medias = np.nanmean(valores, axis=0)
+        medianas, p90 = np.nanpercentile(valores, [50, 90], axis=0)
+        for i, metrica in enumerate(metricas):
+            filas.append([temporada, posicion, metrica] +
+                         [None if np.isnan(v) else float(v) for v in (medias[i], medianas[i], p90[i])])
+    return filas
+
+def actualizar_resumenes(db_path=None):
+    """
+    Actualiza de forma incremental las tablas de resumen de la BD de caché
+    (la de origen solo se lee): solo se recalculan los jugadores con jornadas
+    nuevas, eliminadas o corregidas (huella). Las tablas de equipo y de
+    posición se recalculan únicamente si ha cambiado algún jugador (o si la
+    de posición aún no existe).
+    Devuelve la lista de jugadores recalculados.
+    """
+    temporada = _temporada()
+    origen = obtener_conexion(db_path)
+    conn = _abrir_resumenes(db_path)
+    try:
+        metricas = _metricas_numericas(origen)
+        _crear_tablas(conn, metricas)
+        modificados, eliminados, huellas = _jugadores_modificados(origen, conn, temporada, metricas)
+        sin_posiciones = conn.execute(
+            f"SELECT 1 FROM {TABLA_POSICION} WHERE Temporada = ? LIMIT 1", (temporada,)).fetchone() is None
+
+        if not modificados and not eliminados and not sin_posiciones:
+            conn.commit()
+            return []
+
+        if eliminados:
+            conn.executemany(f"DELETE FROM {TABLA_JUGADOR} WHERE Temporada = ? AND Nombre = ?",
+                             [(temporada, nombre) for nombre in eliminados])
+
+        if modificados:
+            marcadores = ', '.join('?' for _ in modificados)
+            df_modificados = pd.read_sql(
+                f"SELECT * FROM datos_fisicos WHERE Nombre IN ({marcadores})", origen, params=modificados)
+            filas = _resumir_jugadores(df_modificados, metricas, temporada, huellas)
+            columnas = COLUMNAS_BASE_JUGADOR + _columnas_jugador(metricas)
+            columnas_sql = ', '.join(f'"{columna}"' for columna in columnas)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {TABLA_JUGADOR} ({columnas_sql}) VALUES ({', '.join('?' for _ in columnas)})",
+                filas)
+
+        columnas_sql = ', '.join(['Posicion'] + metricas)
+        df_completo = pd.read_sql(f"SELECT {columnas_sql} FROM datos_fisicos", origen)
+        conn.execute(f"DELETE FROM {TABLA_EQUIPO} WHERE Temporada = ?", (temporada,))
+        conn.executemany(
+            f"INSERT INTO {TABLA_EQUIPO} VALUES ({', '.join('?' for _ in range(3 + len(PERCENTILES_EQUIPO)))})",
+            _resumir_equipo(df_completo, metricas, temporada))
+        conn.execute(f"DELETE FROM {TABLA_POSICION} WHERE Temporada = ?", (temporada,))
+        conn.executemany(
+            f"INSERT INTO {TABLA_POSICION} VALUES ({', '.join('?' for _ in range(3 + len(AGREGADOS_POSICION)))})",
+            _resumir_posiciones(df_completo, metricas, temporada))
+
+        conn.commit()
+        return modificados
+    finally:
+        conn.close()
+
+def _cargar_resumenes(db_path=None):
+    """Lee las tablas de resumen a diccionarios en memoria"""
+    conn = _abrir_resumenes(db_path)
+    try:
+        return _leer_resumenes(conn, _temporada())
+    finally:
+        conn.close()
+
+def _leer_resumenes(conn, temporada):
+
+    df_jugadores = pd.read_sql(f"SELECT * FROM {TABLA_JUGADOR} WHERE Temporada = ?", conn, params=[temporada])
+    jugadores = {fila['Nombre']: fila for fila in df_jugadores.to_dict('records')}
+
+    df_equipo = pd.read_sql(f"SELECT * FROM {TABLA_EQUIPO} WHERE Temporada = ?", conn, params=[temporada])
+    equipo = {fila['Metrica']: fila for fila in df_equipo.to_dict('records')}
+
+    # Por posición: arrays alineados con un índice de métricas para buscar
+    # y normalizar vectores de métricas sin recorrerlas una a una
+    df_posiciones = pd.read_sql(f"SELECT * FROM {TABLA_POSICION} WHERE Temporada = ?", conn, params=[temporada])
+    posiciones = {}
+    for posicion, grupo in df_posiciones.groupby('Posicion', sort=False):
+        posiciones[posicion] = {
+            'indice': {metrica: i for i, metrica in enumerate(grupo['Metrica'])},
+            **{agregado: grupo[agregado].to_numpy(dtype=float) for agregado in AGREGADOS_POSICION}
+        }
+    return jugadores, equipo, posiciones
+
+def _obtener_cache(db_path=None):
+    """
+    Devuelve los resúmenes en memoria, actualizándolos si la BD ha cambiado
+    """
+    ruta = db_path or DB_CONFIG['condic_db_path']
+    entrada = _cache.get(ruta)
+    if entrada is not None and entrada['firma'] == firma_bd(ruta):
+        return entrada
+
+    with _lock:
+        entrada = _cache.get(ruta)
+        if entrada is None or entrada['firma'] != firma_bd(ruta):
+            actualizar_resumenes(ruta)
+            jugadores, equipo, posiciones = _cargar_resumenes(ruta)
+            entrada = {'firma': firma_bd(ruta), 'jugadores': jugadores, 'equipo': equipo, 'posiciones': posiciones}
+            _cache[ruta] = entrada
+        return entrada
+
+def obtener_resumen_jugador(nombre_jugador, db_path=None):
+    """
+    Devuelve el resumen materializado de un jugador (medias, máximos y mínimos
+    de cada métrica) o None si no tiene datos
+    """
+    return _obtener_cache(db_path)['jugadores'].get(nombre_jugador)
+
+def obtener_resumen_equipo(db_path=None):
+    """
+    Devuelve media y percentiles de la plantilla por métrica:
+    {metrica: {'Media': ..., 'P10': ..., ..., 'P90': ...}}
+    """
+    return _obtener_cache(db_path)['equipo']
+
+def obtener_referencia_posicion(posicion, metricas, db_path=None):
+    """
+    Devuelve la referencia de una posición para una lista de métricas:
+    {'posicion', 'Media', 'Mediana', 'P90'} con arrays en el orden de
+    `metricas` (NaN si falta alguna). Si la posición no tiene datos se usa
+    la de toda la plantilla (POSICION_TODAS); None si no hay resúmenes.
+    """
+    posiciones = _obtener_cache(db_path)['posiciones']
+    if posicion not in posiciones:
+        posicion = POSICION_TODAS
+    referencia = posiciones.get(posicion)
+    if referencia is None:
+        return None
+
+    indices = np.array([referencia['indice'].get(metrica, -1) for metrica in metricas], dtype=int)
+    encontradas = indices >= 0
+    resultado = {'posicion': posicion}
+    for agregado in AGREGADOS_POSICION:
+        valores = np.full(len(metricas), np.nan)
+        valores[encontradas] = referencia[agregado][indices[encontradas]]
+        resultado[agregado] = valores
+    return resultado
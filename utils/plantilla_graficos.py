@@ -0,0 +1,70 @@
+# utils/plantilla_graficos.py
+import plotly.graph_objects as go
+import plotly.io as pio
+from config import CONFIG
+
+# Nombre con el que se registra la plantilla en pio.templates
+PLANTILLA = 'atleti'
+
+# Secciones de plotly_white que se conservan: solo las que usan los gráficos
+# de la aplicación, para que la plantilla (que viaja en cada figura) pese poco
+SECCIONES_LAYOUT = ('autotypenumbers', 'colorway', 'hovermode', 'hoverlabel', 'polar',
+                    'coloraxis', 'colorscale', 'xaxis', 'yaxis', 'shapedefaults',
+                    'annotationdefaults', 'title')
+TRAZAS_USADAS = ('bar', 'scatter', 'scatterpolar')
+
+# Fondo del área de dibujo (gris claro translúcido)
+FONDO_GRAFICO = 'rgba(240,240,240,0.5)'
+
+def _hex_a_rgba(color, alfa):
+    """Convierte '#RRGGBB' en 'rgba(r, g, b, alfa)'"""
+    color = color.lstrip('#')
+    r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return f"rgba({r}, {g}, {b}, {alfa})"
+
+def crear_plantilla_atleti():
+    """
+    Crea la plantilla de los gráficos a partir de plotly_white y los colores
+    del equipo (CONFIG['team_colors']): fuente, ejes, rejilla y fondos
+    """
+    base = pio.templates['plotly_white'].to_plotly_json()
+    colores = CONFIG['team_colors']
+    texto = colores['text_primary']
+
+    plantilla = go.layout.Template(
+        data={traza: base['data'][traza] for traza in TRAZAS_USADAS if traza in base['data']},
+        layout={seccion: base['layout'][seccion] for seccion in SECCIONES_LAYOUT if seccion in base['layout']}
+    )
+    eje = dict(
+        title_font=dict(color=texto),
+        tickfont=dict(color=texto),
+        gridcolor=_hex_a_rgba(colores['primary'], 0.1)
+    )
+    plantilla.layout.update(
+        font=dict(family="Arial, sans-serif", size=12, color=texto),
+        plot_bgcolor=FONDO_GRAFICO,
+        paper_bgcolor=colores['accent'],
+        xaxis=eje,
+        yaxis=eje
+    )
+    return plantilla
+
+def registrar_plantilla_atleti():
+    """Registra la plantilla en pio.templates (una vez por proceso) y devuelve su nombre"""
+    if PLANTILLA not in pio.templates:
+        pio.templates[PLANTILLA] = crear_plantilla_atleti()
+    return PLANTILLA
+
+_plantilla_json = None
+
+def plantilla_json():
+    """
+    Devuelve la plantilla serializada (dict) para incrustarla en figuras que
+    se construyen como dict sin pasar por go.Figure. No debe modificarse.
+    """
+    global _plantilla_json
+    if _plantilla_json is None:
+        _plantilla_json = pio.templates[PLANTILLA].to_plotly_json()
+    return _plantilla_json
+
+registrar_plantilla_atleti()
@@ -0,0 +1,264 @@
+# utils/player_identity.py
+import os
+import threading
+import functools
+import unicodedata
+import pandas as pd
+from config import DATA_CONFIG
+
+# Resoluciones de nombres recordadas por índice (LRU): los nombres llegan del
+# cliente, así que el memo no puede crecer sin límite
+MAX_RESUELTOS = 1024
+
+# Datos fijos de jugadores clave por si falta el archivo maestro o algún jugador
+JUGADORES_RESPALDO = {
+    'Julián Álvarez': {
+        'nombre_completo': 'Julián Álvarez',
+        'short_name': 'Julián',
+        'id_sofascore': 944656,
+        'ruta_foto': '/assets/players/19.png'
+    },
+    'Axel Witsel': {
+        'nombre_completo': 'Axel Witsel',
+        'short_name': 'Witsel',
+        'id_sofascore': 35612,
+        'ruta_foto': '/assets/players/20.png'
+    },
+    'Javi Galán': {
+        'nombre_completo': 'Javi Galán',
+        'short_name': 'Galán',
+        'id_sofascore': 825133,
+        'ruta_foto': '/assets/players/21.png'
+    },
+    'Giuliano Simeone': {
+        'nombre_completo': 'Giuliano Simeone',
+        'short_name': 'Giuliano',
+        'id_sofascore': 1099352,
+        'ruta_foto': '/assets/players/22.png'
+    },
+    'Reinildo Mandava': {
+        'nombre_completo': 'Reinildo Mandava',
+        'short_name': 'Reinildo',
+        'id_sofascore': 831424,
+        'ruta_foto': '/assets/players/23.png'
+    },
+    'Robin Le Normand': {
+        'nombre_completo': 'Robin Le Normand',
+        'short_name': 'Le Normand',
+        'id_sofascore': 787751,
+        'ruta_foto': '/assets/players/24.png'
+    },
+    'Adrián Niño': {
+        'nombre_completo': 'Adrián Niño',
+        'short_name': 'Niño',
+        'id_sofascore': 1402927,
+        'ruta_foto': '/assets/players/24.png'
+    }
+}
+
+# Correcciones de rutas de fotos (solo en memoria)
+CORRECCIONES_FOTOS = {
+    'Julián Álvarez': '/assets/players/19.png',
+    'Jan Oblak': '/assets/players/13.png',
+    'Reinildo Mandava': '/assets/players/23.png'
+}
+
+def normalize_name(name):
+    """
+    Normaliza nombres para comparación (quita acentos, minúsculas y espacios extra)
+    """
+    if not name:
+        return ""
+
+    name = str(name).lower()
+    name = name.replace('ø', 'o')
+    name = name.replace('æ', 'ae')
+    name = name.replace('å', 'a')
+
+    return ' '.join(unicodedata.normalize('NFKD', name)
+                    .encode('ASCII', 'ignore')
+                    .decode('ASCII')
+                    .split())
+
+def corregir_codificacion(nombre):
+    """
+    Intenta corregir nombres leídos con la codificación equivocada (latin1/utf-8)
+    """
+    try:
+        return nombre.encode('latin1').decode('utf-8')
+    except Exception:
+        return nombre
+
+def _normalizar_usuario(username):
+    """Normaliza un nombre de usuario ('a_niño' -> 'a_nino')"""
+    return normalize_name(str(username).replace('_', ' ')).replace(' ', '_')
+
+class IndiceJugadores:
+    """
+    Índice de identidad de jugadores construido una sola vez a partir del
+    archivo maestro. Resuelve en tiempo constante el id del jugador a partir
+    del nombre completo, nombre corto, id de Sofascore o usuario de login.
+    """
+    def __init__(self, jugadores):
+        # id_jugador -> ficha del jugador
+        self.jugadores = jugadores
+        self.por_nombre = {}
+        self.por_short_name = {}
+        self.por_sofascore = {}
+        self.por_usuario = {}
+        # Memo acotado de resoluciones (la coincidencia parcial recorre el índice)
+        self._resolver = functools.lru_cache(maxsize=MAX_RESUELTOS)(self._resolver_sin_cache)
+
+        for id_jugador, ficha in jugadores.items():
+            nombre_norm = normalize_name(ficha.get('nombre_completo'))
+            short_norm = normalize_name(ficha.get('short_name'))
+            if nombre_norm:
+                self.por_nombre.setdefault(nombre_norm, id_jugador)
+            if short_norm:
+                self.por_short_name.setdefault(short_norm, id_jugador)
+            if ficha.get('id_sofascore') is not None:
+                self.por_sofascore.setdefault(ficha['id_sofascore'], id_jugador)
+
+        # Alias de usuario por prioridad: nombre corto ('de_paul'),
+        # inicial + apellido ('j_musso') y apellido ('simeone')
+        for generar_alias in (self._alias_short_name, self._alias_inicial_apellido, self._alias_apellido):
+            for id_jugador, ficha in jugadores.items():
+                alias = generar_alias(ficha)
+                if alias:
+                    self.por_usuario.setdefault(alias, id_jugador)
+
+    @staticmethod
+    def _alias_short_name(ficha):
+        return normalize_name(ficha.get('short_name')).replace(' ', '_')
+
+    @staticmethod
+    def _alias_inicial_apellido(ficha):
+        partes = normalize_name(ficha.get('nombre_completo')).split()
+        if len(partes) < 2:
+            return None
+        return f"{partes[0][0]}_{partes[-1]}"
+
+    @staticmethod
+    def _alias_apellido(ficha):
+        partes = normalize_name(ficha.get('nombre_completo')).split()
+        return partes[-1] if len(partes) >= 2 else None
+
+    def resolver_nombre(self, nombre):
+        """
+        Devuelve el id del jugador para un nombre de la BD o del CSV (o None)
+        """
+        if not nombre:
+            return None
+        return self._resolver(nombre)
+
+    def _resolver_sin_cache(self, nombre):
+        nombre_norm = normalize_name(corregir_codificacion(nombre))
+        id_jugador = self.por_nombre.get(nombre_norm) or self.por_short_name.get(nombre_norm)
+
+        if id_jugador is None and nombre_norm:
+            # Coincidencia parcial con el nombre completo
+            for nombre_completo_norm, candidato in self.por_nombre.items():
+                if nombre_norm in nombre_completo_norm or nombre_completo_norm in nombre_norm:
+                    id_jugador = candidato
+                    break
+        return id_jugador
+
+    def resolver_sofascore(self, id_sofascore):
+        """Devuelve el id del jugador a partir de su id de Sofascore"""
+        try:
+            return self.por_sofascore.get(int(id_sofascore))
+        except (TypeError, ValueError):
+            return None
+
+    def resolver_usuario(self, username, nombre=None):
+        """
+        Devuelve el id del jugador asociado a un usuario de login, probando
+        primero el nombre de usuario y después el nombre del usuario
+        """
+        id_jugador = self.por_usuario.get(_normalizar_usuario(username)) if username else None
+        if id_jugador is None and nombre:
+            id_jugador = self.por_nombre.get(normalize_name(nombre))
+        return id_jugador
+
+    def ficha(self, id_jugador):
+        """Devuelve la ficha del jugador o None"""
+        return self.jugadores.get(id_jugador)
+
+def _leer_archivo_maestro(file_path):
+    """Lee el archivo maestro (separado por punto y coma, con o sin BOM)"""
+    maestro_df = pd.read_csv(file_path, sep=';', encoding='utf-8-sig')
+    if len(maestro_df.columns) == 1:
+        # Compatibilidad con versiones antiguas separadas por comas
+        maestro_df = pd.read_csv(file_path, encoding='utf-8-sig')
+    return maestro_df
+
+def _valor(fila, columna):
+    valor = fila.get(columna)
+    return None if valor is None or pd.isna(valor) else valor
+
+def construir_indice(file_path=None):
+    """
+    Construye el índice de jugadores a partir del archivo maestro, completado
+    con los datos de respaldo de los jugadores que falten
+    """
+    ruta = file_path or DATA_CONFIG['master_path']
+    jugadores = {}
+
+    try:
+        maestro_df = _leer_archivo_maestro(ruta)
+        for fila in maestro_df.to_dict('records'):
+            nombre_completo = _valor(fila, 'nombre_completo')
+            if not nombre_completo:
+                continue
+
+            id_sofascore = _valor(fila, 'id_sofascore')
+            ruta_foto = _valor(fila, 'ruta_foto') or _valor(fila, 'image_sofascore')
+            if isinstance(ruta_foto, str) and not ruta_foto.startswith('http'):
+                ruta_foto = '/' + ruta_foto.lstrip('/')
+
+            id_jugador = _valor(fila, 'id_unico') or normalize_name(nombre_completo)
+            jugadores[id_jugador] = {
+                'nombre_completo': nombre_completo,
+                'short_name': _valor(fila, 'short_name'),
+                'id_sofascore': int(float(id_sofascore)) if id_sofascore is not None else None,
+                'ruta_foto': CORRECCIONES_FOTOS.get(nombre_completo, ruta_foto),
+                'pais': _valor(fila, 'pais'),
+                'posicion': _valor(fila, 'posicion')
+            }
+    except FileNotFoundError:
+        print("No se encontró el archivo maestro. Usando datos fijos para jugadores clave.")
+    except Exception as e:
+        print(f"Error al cargar archivo maestro: {e}")
+
+    # Completar con los jugadores de respaldo que no estén en el maestro
+    nombres_cargados = {normalize_name(ficha['nombre_completo']) for ficha in jugadores.values()}
+    for nombre_completo, datos in JUGADORES_RESPALDO.items():
+        if normalize_name(nombre_completo) not in nombres_cargados:
+            jugadores[normalize_name(nombre_completo)] = dict(datos, pais=None, posicion=None)
+
+    return IndiceJugadores(jugadores)
+
+_indices = {}
+_lock = threading.Lock()
+
+def obtener_indice_jugadores(file_path=None):
+    """
+    Devuelve el índice compartido de jugadores. Se construye una vez por
+    proceso y solo se reconstruye si cambia el archivo maestro.
+    """
+    ruta = file_path or DATA_CONFIG['master_path']
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    entrada = _indices.get(ruta)
+    if entrada is not None and entrada['mtime'] == mtime:
+        return entrada['indice']
+
+    with _lock:
+        entrada = _indices.get(ruta)
+        if entrada is None or entrada['mtime'] != mtime:
+            entrada = {'mtime': mtime, 'indice': construir_indice(ruta)}
+            _indices[ruta] = entrada
+        return entrada['indice']
@@ -0,0 +1,95 @@
+# utils/precarga_heatmaps.py
+"""
+Precarga los heatmaps de toda la plantilla en la caché de disco para que el
+primer usuario no tenga que esperar a la API de Sofascore ni al renderizado.
+
+Uso (desde la raíz del proyecto):
+    python -m utils.precarga_heatmaps [--hilos 4] [--forzar] [--sin-miniaturas]
+"""
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import HEATMAP_CONFIG
+from utils.player_identity import obtener_indice_jugadores
+from utils.heatmap_generator import precalentar_heatmap
+from utils.heatmap_cache import estadisticas_cache
+
+def obtener_ids_plantilla():
+    """
+    Devuelve {id_sofascore: nombre} de los jugadores del archivo maestro
+    """
+    indice = obtener_indice_jugadores()
+    ids = {}
+    for ficha in indice.jugadores.values():
+        if ficha.get('id_sofascore') is not None:
+            ids.setdefault(ficha['id_sofascore'], ficha['nombre_completo'])
+    return ids
+
+def _precalentar_jugador(id_sofascore, forzar, miniatura):
+    """Precarga un jugador y devuelve (estado, segundos)"""
+    inicio = time.perf_counter()
+    try:
+        estado = precalentar_heatmap(id_sofascore, forzar=forzar, miniatura=miniatura)
+    except Exception as e:
+        print(f"Error al precargar heatmap de {id_sofascore}: {e}")
+        estado = 'error'
+    return estado, time.perf_counter() - inicio
+
+def precargar_heatmaps(ids=None, hilos=None, forzar=False, miniaturas=True):
+    """
+    Descarga y dibuja en paralelo (con un máximo de 'hilos' a la vez) los
+    heatmaps de los jugadores indicados o de toda la plantilla. Muestra el
+    progreso con el tiempo de cada jugador y devuelve la lista de resultados.
+    """
+    ids = ids if ids is not None else obtener_ids_plantilla()
+    if not isinstance(ids, dict):
+        ids = {id_sofascore: str(id_sofascore) for id_sofascore in ids}
+    hilos = hilos or HEATMAP_CONFIG['precarga_hilos']
+
+    total = len(ids)
+    resultados = []
+    inicio = time.perf_counter()
+    print(f"Precargando {total} heatmaps con {hilos} hilos...")
+
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        futuros = {
+            executor.submit(_precalentar_jugador, id_sofascore, forzar, miniaturas): id_sofascore
+            for id_sofascore in ids
+        }
+        for i, futuro in enumerate(as_completed(futuros), start=1):
+            id_sofascore = futuros[futuro]
+            estado, segundos = futuro.result()
+            resultados.append({
+                'id_sofascore': id_sofascore,
+                'nombre': ids[id_sofascore],
+                'estado': estado,
+                'segundos': segundos
+            })
+            print(f"[{i}/{total}] {ids[id_sofascore]} ({id_sofascore}): {estado} en {segundos:.2f} s")
+
+    # Resumen por estado
+    duracion = time.perf_counter() - inicio
+    por_estado = {}
+    for resultado in resultados:
+        por_estado[resultado['estado']] = por_estado.get(resultado['estado'], 0) + 1
+    resumen = ', '.join(f"{estado}: {n}" for estado, n in sorted(por_estado.items()))
+    print(f"Precarga terminada en {duracion:.1f} s ({resumen})")
+    print(f"Caché: {estadisticas_cache()}")
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Precarga los heatmaps de la plantilla en la caché")
+    parser.add_argument('--hilos', type=int, default=None,
+                        help="Jugadores procesados a la vez (por defecto HEATMAP_CONFIG['precarga_hilos'])")
+    parser.add_argument('--forzar', action='store_true',
+                        help="Vuelve a descargar y dibujar aunque el heatmap esté en caché")
+    parser.add_argument('--sin-miniaturas', action='store_true',
+                        help="No genera las miniaturas WebP")
+    args = parser.parse_args()
+
+    resultados = precargar_heatmaps(hilos=args.hilos, forzar=args.forzar, miniaturas=not args.sin_miniaturas)
+    if any(resultado['estado'] == 'error' for resultado in resultados):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
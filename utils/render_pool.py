@@ -0,0 +1,110 @@
+# utils/render_pool.py
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from config import HEATMAP_CONFIG
+
+# Pool de procesos compartido (se crea con el primer render):
+# {'executor', 'pendientes'}. Los trabajos pendientes se cuentan por pool para
+# que los de un pool descartado no descuenten huecos del siguiente.
+_pool = None
+_lock = threading.Lock()
+
+# Contadores de uso del pool (por proceso)
+_contadores = {'enviados': 0, 'completados': 0, 'rechazados': 0, 'timeouts': 0, 'errores': 0}
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        _pool = {'executor': ProcessPoolExecutor(max_workers=HEATMAP_CONFIG['render_procesos']),
+                 'pendientes': 0}
+    return _pool
+
+def _reiniciar_pool(roto):
+    """
+    Descarta un pool roto (p. ej. si un proceso ha muerto) para crear otro.
+    Solo si sigue siendo el actual: si otro hilo ya lo ha reemplazado no se
+    toca el nuevo.
+    """
+    global _pool
+    with _lock:
+        if _pool is not roto:
+            return
+        _pool = None
+    roto['executor'].shutdown(wait=False, cancel_futures=True)
+
+def _al_terminar(futuro, pool, trabajo, al_completar):
+    """
+    Libera el hueco en la cola del pool que recibió el trabajo y, si quien
+    pidió el render ya no lo espera (timeout), entrega el resultado a al_completar
+    """
+    exito = not futuro.cancelled() and futuro.exception() is None
+    with _lock:
+        pool['pendientes'] = max(0, pool['pendientes'] - 1)
+        if exito:
+            _contadores['completados'] += 1
+        entregar = exito and trabajo['abandonado']
+    if entregar and al_completar is not None:
+        try:
+            al_completar(futuro.result())
+        except Exception as e:
+            print(f"Error al guardar el render terminado: {e}")
+
+def renderizar_en_pool(funcion, *args, al_completar=None, timeout=None):
+    """
+    Ejecuta funcion(*args) en el pool de procesos y devuelve su resultado.
+    Devuelve None si el pool está saturado (más de 'render_cola_max' trabajos
+    pendientes), si se supera el timeout o si el render falla. Si el trabajo
+    termina después del timeout se llama a al_completar con el resultado,
+    para poder guardarlo igualmente en la caché.
+    """
+    timeout = HEATMAP_CONFIG['render_timeout'] if timeout is None else timeout
+
+    with _lock:
+        pool = _obtener_pool()
+        if pool['pendientes'] >= HEATMAP_CONFIG['render_cola_max']:
+            _contadores['rechazados'] += 1
+            return None
+        pool['pendientes'] += 1
+        _contadores['enviados'] += 1
+
+    try:
+        futuro = pool['executor'].submit(funcion, *args)
+    except (BrokenProcessPool, RuntimeError) as e:
+        print(f"Pool de render no disponible: {e}")
+        with _lock:
+            pool['pendientes'] = max(0, pool['pendientes'] - 1)
+            _contadores['errores'] += 1
+        _reiniciar_pool(pool)
+        return None
+    trabajo = {'abandonado': False}
+    futuro.add_done_callback(lambda f: _al_terminar(f, pool, trabajo, al_completar))
+
+    try:
+        return futuro.result(timeout=timeout)
+    except TimeoutError:
+        with _lock:
+            trabajo['abandonado'] = True
+            terminado = futuro.done()
+            if not terminado:
+                _contadores['timeouts'] += 1
+        if not terminado:
+            return None
+        # Ha terminado justo al expirar el timeout: se usa el resultado
+        try:
+            return futuro.result()
+        except Exception:
+            pass
+    except BrokenProcessPool as e:
+        print(f"Pool de render roto: {e}")
+        _reiniciar_pool(pool)
+    except Exception as e:
+        print(f"Error en el render del heatmap: {e}")
+    with _lock:
+        _contadores['errores'] += 1
+    return None
+
+def estadisticas_pool():
+    """Devuelve una copia de los contadores y los trabajos pendientes"""
+    with _lock:
+        return dict(_contadores, pendientes=_pool['pendientes'] if _pool is not None else 0)
@@ -0,0 +1,70 @@
+# utils/session_store.py
+import secrets
+import threading
+from collections import OrderedDict
+from config import SESSION_STORE_CONFIG
+
+class AlmacenSesiones:
+    """
+    Almacén LRU en memoria de datos por sesión. Cada entrada se guarda con
+    una clave opaca (la única que viaja al navegador), el usuario dueño y
+    la versión de los datos de origen; solo se devuelve al mismo usuario y
+    mientras la versión no cambie.
+    """
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {'hits': 0, 'misses': 0, 'caducadas': 0, 'denegadas': 0, 'expulsadas': 0}
+
+    def obtener(self, clave, usuario, version):
+        """Devuelve el valor guardado o None si no existe, es de otro usuario o ha cambiado la versión"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self._contadores['misses'] += 1
+                return None
+            if entrada['usuario'] != usuario:
+                self._contadores['denegadas'] += 1
+                return None
+            if entrada['version'] != version:
+                del self._entradas[clave]
+                self._contadores['caducadas'] += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self._contadores['hits'] += 1
+            return entrada['valor']
+
+    def guardar(self, clave, usuario, version, valor):
+        """Guarda el valor y expulsa la entrada menos usada si hace falta"""
+        with self._lock:
+            self._entradas[clave] = {'usuario': usuario, 'version': version, 'valor': valor}
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self._contadores['expulsadas'] += 1
+
+    def estadisticas(self):
+        """Devuelve una copia de los contadores y el número de entradas guardadas"""
+        with self._lock:
+            return dict(self._contadores, entradas=len(self._entradas))
+
+_almacen = AlmacenSesiones(SESSION_STORE_CONFIG['max_entradas'])
+
+def nueva_clave():
+    """Genera una clave opaca para una sesión"""
+    return secrets.token_urlsafe(16)
+
+def guardar_en_sesion(clave, usuario, version, valor):
+    """Guarda el valor de la sesión 'clave' del usuario en el almacén del proceso"""
+    _almacen.guardar(clave, usuario, version, valor)
+
+def obtener_de_sesion(clave, usuario, version):
+    """Devuelve el valor de la sesión 'clave' o None si hay que volver a cargarlo"""
+    if not clave:
+        return None
+    return _almacen.obtener(clave, usuario, version)
+
+def estadisticas_sesiones():
+    """Devuelve los contadores del almacén de sesiones"""
+    return _almacen.estadisticas()
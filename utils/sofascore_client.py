@@ -0,0 +1,174 @@
+# utils/sofascore_client.py
+import time
+import random
+import threading
+from concurrent.futures import Future, TimeoutError
+import requests
+from requests.adapters import HTTPAdapter
+from config import SOFASCORE_CONFIG
+
+# Cabeceras para simular un navegador normal
+CABECERAS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json',
+    'Referer': 'https://www.sofascore.com/'
+}
+
+# Códigos de respuesta que merece la pena reintentar
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+class LimitadorTasa:
+    """
+    Token bucket: permite 'tasa' peticiones por segundo de media con ráfagas
+    de hasta 'capacidad'. Solo espera quien supera el ritmo.
+    """
+    def __init__(self, tasa, capacidad):
+        self.tasa = float(tasa)
+        self.capacidad = float(capacidad)
+        self._tokens = float(capacidad)
+        self._ultima = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        """Consume un token, esperando lo justo si no queda ninguno"""
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultima) * self.tasa)
+                self._ultima = ahora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.tasa
+            time.sleep(espera)
+
+class ClienteSofascore:
+    """
+    Cliente de la API de Sofascore con conexiones keep-alive, limitador de
+    tasa, timeouts, reintentos con backoff exponencial y agrupación de
+    peticiones: si varios hilos piden la misma URL a la vez, solo uno llama
+    a la API y el resto recibe su resultado.
+    """
+    def __init__(self, base_url=None, timeout=None, reintentos=None, backoff=None,
+                 peticiones_por_segundo=None, rafaga=None, conexiones=None, espera_max=None,
+                 espera_agrupada=None):
+        self.base_url = (base_url or SOFASCORE_CONFIG['base_url']).rstrip('/')
+        self.timeout = timeout or SOFASCORE_CONFIG['timeout']
+        self.reintentos = SOFASCORE_CONFIG['reintentos'] if reintentos is None else reintentos
+        self.backoff = SOFASCORE_CONFIG['backoff'] if backoff is None else backoff
+        self.espera_max = SOFASCORE_CONFIG['espera_max'] if espera_max is None else espera_max
+        # Lo que espera un hilo agrupado al que hace la petición: el presupuesto
+        # total de reintentos (timeouts de cada intento más esperas entre ellos)
+        self.espera_agrupada = self._presupuesto_reintentos() if espera_agrupada is None else espera_agrupada
+        self.limitador = LimitadorTasa(peticiones_por_segundo or SOFASCORE_CONFIG['peticiones_por_segundo'],
+                                       rafaga or SOFASCORE_CONFIG['rafaga'])
+
+        conexiones = conexiones or SOFASCORE_CONFIG['conexiones']
+        self.session = requests.Session()
+        self.session.headers.update(CABECERAS)
+        adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones)
+        self.session.mount('https://', adaptador)
+        self.session.mount('http://', adaptador)
+
+        # Peticiones en curso: ruta -> Future con el JSON (o None)
+        self._en_curso = {}
+        self._lock = threading.Lock()
+
+    def obtener_json(self, ruta):
+        """
+        Devuelve el JSON de la ruta (relativa a base_url) o None si no está
+        disponible. Las peticiones simultáneas a la misma ruta se agrupan.
+        """
+        with self._lock:
+            futuro = self._en_curso.get(ruta)
+            propietario = futuro is None
+            if propietario:
+                futuro = Future()
+                self._en_curso[ruta] = futuro
+
+        if not propietario:
+            try:
+                return futuro.result(timeout=self.espera_agrupada)
+            except TimeoutError:
+                print(f"Sin respuesta de Sofascore tras {self.espera_agrupada:.1f} s esperando a otra petición: {ruta}")
+                return None
+
+        try:
+            resultado = self._peticion(ruta)
+            futuro.set_result(resultado)
+            return resultado
+        except Exception as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._en_curso.pop(ruta, None)
+
+    def _presupuesto_reintentos(self):
+        """Segundos máximos que puede tardar _peticion con todos sus reintentos"""
+        por_intento = sum(self.timeout) if isinstance(self.timeout, (tuple, list)) else self.timeout
+        return (self.reintentos + 1) * por_intento + self.reintentos * self.espera_max
+
+    def _espera_reintento(self, intento, response=None):
+        """
+        Segundos antes del siguiente intento, como mucho espera_max. Respeta
+        Retry-After si cabe en ese límite; si el servidor pide esperar más,
+        devuelve None para abandonar sin bloquear el hilo.
+        """
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            espera = float(response.headers['Retry-After'])
+            return espera if espera <= self.espera_max else None
+        return min(self.backoff * (2 ** intento) * (1 + random.random() * 0.1), self.espera_max)
+
+    def _peticion(self, ruta):
+        """Realiza la petición HTTP con reintentos y devuelve el JSON o None"""
+        url = f"{self.base_url}/{ruta.lstrip('/')}"
+        for intento in range(self.reintentos + 1):
+            self.limitador.adquirir()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                print(f"Error de conexión con Sofascore ({url}): {e}")
+                response = None
+            else:
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        print(f"Respuesta no válida de Sofascore para {url}")
+                        return None
+                if response.status_code not in CODIGOS_REINTENTABLES:
+                    print(f"Error al obtener {url}, código: {response.status_code}")
+                    return None
+                print(f"Sofascore respondió {response.status_code} para {url}")
+
+            if intento < self.reintentos:
+                espera = self._espera_reintento(intento, response)
+                if espera is None:
+                    print(f"Sofascore pide esperar más de {self.espera_max} s, se abandona: {url}")
+                    return None
+                time.sleep(espera)
+
+        print(f"Sin respuesta válida de Sofascore tras {self.reintentos + 1} intentos: {url}")
+        return None
+
+    def obtener_heatmap(self, id_sofascore, torneo, temporada):
+        """Devuelve el JSON del heatmap de un jugador en un torneo y temporada"""
+        return self.obtener_json(
+            f"player/{id_sofascore}/unique-tournament/{torneo}/season/{temporada}/heatmap/overall")
+
+    def cerrar(self):
+        """Cierra las conexiones del pool"""
+        self.session.close()
+
+_cliente = None
+_lock_cliente = threading.Lock()
+
+def obtener_cliente():
+    """Devuelve el cliente compartido del proceso (se crea la primera vez)"""
+    global _cliente
+    if _cliente is None:
+        with _lock_cliente:
+            if _cliente is None:
+                _cliente = ClienteSofascore()
+    return _cliente
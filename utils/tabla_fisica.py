@@ -0,0 +1,54 @@
+# utils/tabla_fisica.py
+import numpy as np
+from dash.dash_table.Format import Format, Scheme
+
+# Decimales con los que se muestran (y se comparan) las métricas float
+DECIMALES_TABLA = 1
+
+def valores_redondeados(serie):
+    """Array float64 de una o varias columnas numéricas redondeadas como se muestran en la tabla"""
+    return np.round(serie.to_numpy(dtype='float64'), DECIMALES_TABLA)
+
+def valores_columna(serie):
+    """
+    Devuelve los valores numéricos de una columna tal como viajan a la tabla:
+    floats redondeados a DECIMALES_TABLA (NaN como None) y enteros tal cual
+    """
+    if serie.dtype.kind == 'f':
+        return [None if valor != valor else valor for valor in valores_redondeados(serie).tolist()]
+    return serie.to_numpy().tolist()
+
+def formatear_columna(serie):
+    """
+    Prepara una columna completa para la DataTable: las numéricas se envían
+    como números (el formato de un decimal lo aplica la propia tabla) para
+    que filter_query compare valores y no texto; el resto con str()
+    """
+    if serie.dtype.kind in 'fiu':
+        return valores_columna(serie)
+    return list(map(str, serie.to_numpy().tolist()))
+
+def formatear_tabla(df, metricas):
+    """
+    Devuelve las filas de la tabla de datos físicos (lista de dicts) con la
+    Jornada y las métricas pedidas. Cada columna se prepara de una vez y las
+    filas se montan en una sola pasada.
+    """
+    claves = ['Jornada'] + [metrica for metrica in metricas if metrica in df.columns]
+    columnas = [formatear_columna(df[clave]) for clave in claves]
+    return [dict(zip(claves, fila)) for fila in zip(*columnas)]
+
+def columnas_tabla(df, metricas):
+    """
+    Definición de columnas de la tabla: Jornada primero y una por métrica.
+    Las numéricas se declaran 'numeric' y las float se muestran con un decimal.
+    """
+    columnas = [{'name': 'Jornada', 'id': 'Jornada', 'type': 'numeric'}]
+    for metrica in metricas:
+        columna = {'name': metrica.replace('_', ' ').title(), 'id': metrica}
+        if metrica in df.columns and df[metrica].dtype.kind in 'fiu':
+            columna['type'] = 'numeric'
+            if df[metrica].dtype.kind == 'f':
+                columna['format'] = Format(precision=DECIMALES_TABLA, scheme=Scheme.fixed)
+        columnas.append(columna)
+    return columnas